@@ -3,6 +3,8 @@
 import heapq
 import math
 
+import numpy as np
+
 from frontend.Terrain import *
 from logger import debug_print
 from Units import *
@@ -10,9 +12,20 @@ from Building import *
 
 
 class Action:
-    def __init__(self, game_map):
+    # (dx, dy, cost) of the 8 moves, in the order the pathfinding explores them
+    NEIGHBOR_STEPS = [
+        (-1, 0, 1), (1, 0, 1),
+        (0, -1, 1), (0, 1, 1),
+        (-1, -1, 1.414), (-1, 1, 1.414),
+        (1, -1, 1.414), (1, 1, 1.414)
+    ]
+
+    def __init__(self, game_map, movement_batch=False):
         self.map = game_map
         self.debug_print = debug_print
+        # With a batch, move_unit only plans and the kinematic step of all units is done at once in flush_moves
+        self.movement_batch = MovementBatch(self) if movement_batch else None
+        self.expansions = 0  # Nodes expanded by the grid A*, for the benchmarks
 
 
     def get_direction(self, start_x, start_y, target_x, target_y):
@@ -67,7 +80,13 @@ class Action:
 
         # If path is not already constructed, construct it using A* algorithm
         if not hasattr(unit, 'path') or not unit.path:
-            unit.path = self.astar_pathfinding((int(start_x), int(start_y)), (target_x, target_y))
+            unit.path = self.plan_path(unit, (int(start_x), int(start_y)), (target_x, target_y))
+            if unit.path is None and self.is_planning(unit):
+                return True  # Waits for its search to finish in the next ticks
+            if unit.path == [] and (start_x, start_y) == (target_x, target_y):
+                self._arrive(unit, target_x, target_y, start_x, start_y)  # Already standing on its target
+                return True
+            unit.path = self.reserve_path(unit, (int(start_x), int(start_y)), unit.path, current_time_called)
 
         # Initialize last move time if not already set
         if not hasattr(unit, 'last_move_time'):
@@ -87,11 +106,19 @@ class Action:
 
             # Check if the next step is free (dynamic obstacle detection)
             if not self.map.is_tile_free_for_unit(next_step[0], next_step[1]):
-                # Recalculate path if the next step is blocked
-                unit.path = self.astar_pathfinding((int(start_x), int(start_y)), (target_x, target_y))
+                # Repair the path if the next step is blocked
+                unit.path = self.repair_path(unit, (int(start_x), int(start_y)), (target_x, target_y))
                 if not unit.path:
+                    if self.is_planning(unit):
+                        return True
                     self.debug_print("Path not found or obstructed", 'Yellow')
                     return False  # No valid path found
+                unit.path = self.reserve_path(unit, (int(start_x), int(start_y)), unit.path, current_time_called)
+
+            if self.movement_batch is not None:
+                # Advanced together with every other moving unit in flush_moves
+                self.movement_batch.add(unit, next_step, (target_x, target_y), (start_x, start_y))
+                return True
 
             # Calculate the direction vector to the next step
             direction_x = next_step[0] - unit.position[0]
@@ -105,19 +132,7 @@ class Action:
 
                 # Snap to the tile if it's the last step before the target
                 if not unit.path:  # No more steps in the path
-                    unit.position = (target_x, target_y)
-                    unit.path = None
-                    unit.target_position = None
-                    Map.move_unit(self.map, unit, int(unit.position[0]), int(unit.position[1]), int(start_x), int(start_y))
-                    del unit.last_move_time
-                    if hasattr(unit, 'last_gather_time'):
-                        del unit.last_gather_time
-                    if hasattr(unit, 'path'):
-                        del unit.path
-                    if hasattr(unit, 'last_move_time'):
-                        del unit.last_move_time
-                    unit.is_moving = False
-                    #self.debug_print("Reached target!")
+                    self._arrive(unit, target_x, target_y, start_x, start_y)
                     return True
             else:
                 # Otherwise, move partway towards the next step
@@ -132,14 +147,149 @@ class Action:
 
             # Update the last move time
             unit.last_move_time = current_time
-            Map.move_unit(self.map, unit, int(unit.position[0]), int(unit.position[1]), int(start_x), int(start_y))
+            self._update_tile(unit, start_x, start_y)
 
             return True
 
         return False
 
+    def _arrive(self, unit, target_x, target_y, start_x, start_y):
+        unit.position = (target_x, target_y)
+        if self.map.path_repairs is not None:
+            self.map.path_repairs.release(unit)
+        unit.path = None
+        unit.target_position = None
+        self._update_tile(unit, start_x, start_y)
+        if hasattr(unit, 'last_move_time'):
+            del unit.last_move_time
+        if hasattr(unit, 'last_gather_time'):
+            del unit.last_gather_time
+        if hasattr(unit, 'path'):
+            del unit.path
+        unit.is_moving = False
+        #self.debug_print("Reached target!")
+
+    def _update_tile(self, unit, start_x, start_y):
+        # Tile occupancy only changes when the unit crosses a tile boundary
+        new_x, new_y = int(unit.position[0]), int(unit.position[1])
+        if (new_x, new_y) != (int(start_x), int(start_y)):
+            Map.move_unit(self.map, unit, new_x, new_y, int(start_x), int(start_y))
+
+    def flush_moves(self, current_time_called):
+        if self.movement_batch is not None:
+            self.movement_batch.flush(current_time_called)
+
+
+    def plan_path(self, unit, start, goal):
+        # Units of a group heading to the same building share its flow field instead of running one A* each
+        flow_fields = self.map.flow_fields
+        if flow_fields is not None and flow_fields.leads_to(unit, goal):
+            path_cache = self.map.path_cache
+            path = path_cache.get(start, goal) if path_cache is not None else None
+            if path is None:
+                ready, path = flow_fields.path(unit, start)
+                if not ready:
+                    self.map.path_queue.defer(unit)
+                    return None  # The field reaches the unit at the next ticks
+                end = path[-1] if path else start
+                if path is not None and end != goal:
+                    # The field ends on the nearest tile around the building: walk around it to the unit's own slot
+                    rest = self.astar_pathfinding(end, goal)
+                    path = path + rest if rest is not None else None
+                if path_cache is not None and path:
+                    path_cache.put(start, goal, path)
+            if path is not None:
+                return path
+        # Villagers' trips between the resources and a drop point follow the drop point's field
+        if self.map.routes is not None:
+            ready, path = self.map.routes.path(start, goal, self.astar_pathfinding)
+            if not ready:
+                self.map.path_queue.defer(unit)
+                return None  # The field reaches the unit at the next ticks
+            if path is not None:
+                return path
+        if self.map.path_queue is not None and self.map.pathfinder is None:
+            return self.queued_pathfinding(unit, start, goal)
+        return self.astar_pathfinding(start, goal)
+
+    def queued_pathfinding(self, unit, start, goal):
+        # Same steps as astar_pathfinding, but the search is spread over the next ticks by the PathQueue
+        path_queue = self.map.path_queue
+        path_cache = self.map.path_cache
+        if path_cache is not None and unit not in path_queue:
+            path = path_cache.get(start, goal)
+            if path is not None:
+                return path
+        regions = self.map.regions
+        if regions is not None and not regions.reachable(start, goal):
+            regions.rejections += 1
+            path_queue.release(unit)
+            return None
+        _, path = path_queue.request(unit, start, goal)
+        return path  # None while the search is running
+
+    def reserve_path(self, unit, start, path, current_time_called):
+        # Books the tiles of the new path; a path crossing another unit's at the same time is planned again around it
+        reservations = self.map.reservations
+        if reservations is None or not path:
+            return path
+        following_field = self.map.flow_fields is not None and unit in self.map.flow_fields.heading
+        path_queue = self.map.path_queue
+        allowance = path_queue.allowance() if path_queue is not None else float('inf')
+        if not following_field and allowance > 0 and reservations.has_conflict(unit, path, start, current_time_called, unit.speed):
+            # Paid from the tick's node budget; without budget left the unit keeps its path
+            detour, expansions = reservations.detour(self.map, unit, start, path, current_time_called, unit.speed, allowance)
+            if path_queue is not None:
+                path_queue.spend(expansions)
+            if detour:
+                reservations.detours += 1
+                path = detour
+        reservations.reserve(unit, path, start, current_time_called, unit.speed)
+        return path
+
+    def choose_slot(self, unit, slots, current_time_called):
+        # Spreads the units dropping off at / attacking the same building over the tiles around it
+        if self.map.reservations is None or not slots:
+            return slots[0] if slots else None
+        return self.map.reservations.choose_slot(unit, slots, current_time_called)
+
+    def is_planning(self, unit):
+        return self.map.path_queue is not None and unit in self.map.path_queue
+
+    def repair_path(self, unit, start, goal):
+        # Only the cut stretch is planned again, up to a tile further on the path; a full search if that fails
+        path_repairs = self.map.path_repairs
+        if path_repairs is not None and unit.path:
+            path = path_repairs.repair(unit, start, unit.path)
+            if path is not False:
+                return path
+        return self.plan_path(unit, start, goal)
 
     def astar_pathfinding(self, start, goal):
+        path_cache = self.map.path_cache
+        if path_cache is not None:
+            path = path_cache.get(start, goal)
+            if path is not None:
+                return path
+        regions = self.map.regions
+        if regions is not None and not regions.reachable(start, goal):
+            regions.rejections += 1
+            return None  # Goal walled in (or in another region): no need to flood the map
+        path = self._search(start, goal)
+        if path_cache is not None and path:
+            path_cache.put(start, goal, path)
+        return path
+
+    def _search(self, start, goal):
+        pathfinder = self.map.pathfinder
+        if pathfinder is not None:
+            path = pathfinder.find_path(start, goal)
+            if path is not None:
+                return path
+            pathfinder.fallbacks += 1  # Same guarantees as the grid A*: fall back on it
+        return self._astar_search(start, goal)
+
+    def _astar_search(self, start, goal):
         open_list = []
         heapq.heappush(open_list, (0, start))  # Initialisation avec le point de départ
 
@@ -147,8 +297,10 @@ class Action:
         g_cost = {start: 0}  # Coût actuel pour atteindre chaque nœud
         closed_set = set()  # Ensemble des nœuds déjà visités
 
-        def heuristic(a, b):
-            return abs(a[0] - b[0]) + abs(a[1] - b[1])  # Distance Manhattan
+        # One lookup in the padded walkability bitmap replaces the bounds and tile checks
+        walkable = self.map.walkable
+        stride = self.map.stride
+        goal_x, goal_y = goal
 
         while open_list:
             _, current = heapq.heappop(open_list)
@@ -158,45 +310,48 @@ class Action:
                 return self._reconstruct_path(came_from, current)
 
             closed_set.add(current)
-
-            for neighbor in self._get_neighbors(current):
-                if neighbor in closed_set:
+            self.expansions += 1
+            x, y = current
+            current_g_cost = g_cost[current]
+
+            for dx, dy, move_cost in self.NEIGHBOR_STEPS:
+                nx, ny = x + dx, y + dy
+                # Vérifier si le voisin est bloqué (le bord de la carte l'est aussi)
+                if not walkable[(ny + 1) * stride + nx + 1]:
                     continue
-
-                # Vérifier si le voisin est bloqué
-                if not self.map.is_tile_free_for_unit(neighbor[0], neighbor[1]):
+                neighbor = (nx, ny)
+                if neighbor in closed_set:
                     continue
 
                 # Coût du chemin jusqu'au voisin
-                tentative_g_cost = g_cost[current] + self._move_cost(current, neighbor)
+                tentative_g_cost = current_g_cost + move_cost
 
                 if neighbor not in g_cost or tentative_g_cost < g_cost[neighbor]:
                     g_cost[neighbor] = tentative_g_cost
-                    priority = tentative_g_cost + heuristic(neighbor, goal)
+                    priority = tentative_g_cost + abs(nx - goal_x) + abs(ny - goal_y)  # Distance Manhattan
                     heapq.heappush(open_list, (priority, neighbor))
                     came_from[neighbor] = current
 
         # Aucun chemin trouvé
         return None
 
+    def _wake(self, unit, current_time_called):
+        # Units sleeping in the scheduler (gathering, constructing...) must react at the next pass
+        if self.map.scheduler is not None:
+            self.map.scheduler.wake(unit, current_time_called)
+
     def _is_within_bounds(self, x, y):
         return 0 <= x < self.map.width and 0 <= y < self.map.height
 
     def _get_neighbors(self, position):
         x, y = position
+        walkable = self.map.walkable
+        stride = self.map.stride
         neighbors = []
 
-        # Possible directions
-        directions = [
-            (-1, 0), (1, 0),
-            (0, -1), (0, 1),
-            (-1, -1), (-1, 1),
-            (1, -1), (1, 1)
-        ]
-
-        for dx, dy in directions:
+        for dx, dy, _ in self.NEIGHBOR_STEPS:
             nx, ny = x + dx, y + dy
-            if self._is_within_bounds(nx, ny) and self.map.is_tile_free_for_unit(nx, ny):
+            if walkable[(ny + 1) * stride + nx + 1]:
                 neighbors.append((nx, ny))
 
         return neighbors
@@ -334,7 +489,7 @@ class Action:
         # Check if there is a resource on the target tile and it's the correct type
         if (tile and tile.resource and tile.resource.type == resource_type) or (resource_type == "Food" and tile.building and tile.building.name == "Farm"):
             if resource_type == "Food":
-                tile.building.is_farmed = True
+                tile.building.player.set_farmed(tile.building, True)
             # Ensure the unit has capacity to gather more of this resource
             if unit.carrying[resource_type] < unit.carry_capacity and (tile.resource and tile.resource.amount > 0 or (tile.building and tile.building.name == "Farm" and tile.building.food > 0)):
                 # Initialize last gather time if it hasn't been set
@@ -345,9 +500,10 @@ class Action:
                 time_since_last_gather = current_time_called - unit.last_gather_time
                 gatherable_amount = unit.gather_rate * time_since_last_gather
 
-                # Calculate the actual amount the unit can carry
+                # Calculate the actual amount the unit can carry, never more than the tile still holds
                 space_left = unit.carry_capacity - unit.carrying[resource_type]
-                amount_to_gather = min(gatherable_amount, space_left)
+                remaining = tile.building.food if resource_type == "Food" else tile.resource.amount
+                amount_to_gather = min(gatherable_amount, space_left, remaining)
 
                 # Update unit's carrying load and the resource amount on the tile
                 if amount_to_gather > 0:
@@ -356,8 +512,7 @@ class Action:
                         tile.resource.amount -= amount_to_gather
                         # If resource is depleted, remove it from the map
                         if tile.resource.amount <= 0:
-                            tile.resource = None
-                            self.map.resources[resource_type].remove(unit.target_resource)
+                            self.map.deplete_resource(tile.x, tile.y)
                     elif resource_type == "Food" and tile.building.name == "Farm":
                         tile.building.food -= amount_to_gather
                         if tile.building.food <= 0:
@@ -374,29 +529,26 @@ class Action:
         if unit.carrying[resource_type] >= unit.carry_capacity or unit.task == "returning":
             unit.task = "returning"
             # Locate the nearest drop-off location (Town Center or Camp)
-            if resource_type == "Food" and tile.building:
-                tile.building.is_farmed = False
+            if resource_type == "Food" and tile.building and tile.building.name == "Farm":
+                tile.building.player.set_farmed(tile.building, False)
             returning_position = Map.find_drop_point(self.map, unit.position, unit.player)
 
             # Move the unit to a tile around the building at the returning position if found
             if returning_position:
                 building = self.map.grid[returning_position[1]][returning_position[0]].building
                 if building:
-                    building_size = building.size  # Assuming building has a size attribute
                     building_position = building.position
 
-                    # Find a tile around the building
-                    surrounding_tiles = []
-                    for dx in range(-1, building_size + 1):
-                        for dy in range(-1, building_size + 1):
-                            if (dx == -1 or dx == building_size) or (dy == -1 or dy == building_size):
-                                tile_x = building_position[0] + dx
-                                tile_y = building_position[1] + dy
-                                if self.map.is_tile_free_for_unit(tile_x, tile_y):
-                                    surrounding_tiles.append((tile_x, tile_y))
+                    # Find a tile around the building, not already taken by another unit dropping off there
+                    surrounding_tiles = [
+                        tile for tile in self.get_adjacent_positions(building_position[0], building_position[1], building.size)
+                        if self.map.is_tile_free_for_unit(tile[0], tile[1])
+                    ]
 
                     if surrounding_tiles:
-                        new_position = surrounding_tiles[0]  # Choose the first accessible tile
+                        if self.map.routes is not None:
+                            self.map.routes.register(tuple(building_position), surrounding_tiles)
+                        new_position = self.choose_slot(unit, surrounding_tiles, current_time_called)
                         self.move_unit(unit, new_position[0], new_position[1], current_time_called)
 
                         # Check if unit has reached the drop-off destination to deposit resources
@@ -424,6 +576,8 @@ class Action:
         if not enemy_unit:
             unit.task = None
             unit.target_attack = None
+            if self.map.flow_fields is not None:
+                self.map.flow_fields.release(unit)
             if hasattr(unit, 'path'):
                 del unit.path
             if hasattr(unit, 'last_move_time'):
@@ -437,10 +591,8 @@ class Action:
         if isinstance(enemy_unit, Building):
             adjacent_tiles = self.get_adjacent_positions(enemy_unit.position[0], enemy_unit.position[1], enemy_unit.size)
             free_tiles = [tile for tile in adjacent_tiles if self.map.is_tile_free_for_unit(tile[0], tile[1])]
-            for tile in free_tiles:
-                if self.map.is_tile_free_for_unit(tile[0], tile[1]):
-                    target_x, target_y = tile
-                    break
+            if free_tiles:
+                target_x, target_y = self.choose_slot(unit, free_tiles, current_time_called)  # Each attacker its own side of the building
         else:
             target_x, target_y = enemy_unit.position
 
@@ -449,6 +601,7 @@ class Action:
             unit.task = "attacking"
             enemy_unit.is_attacked_by = unit
             enemy_unit.task = "is_attacked"
+            self._wake(enemy_unit, current_time_called)
             unit.is_moving = False
             self._attack(unit, enemy_unit, current_time_called)
         elif isinstance(enemy_unit, Building) and (unit.position[0] == target_x and unit.position[1] == target_y or (isinstance(unit, Archer) and abs(unit.position[0] - target_x) <= unit.range and unit.position[1] == target_y)):
@@ -457,11 +610,18 @@ class Action:
             unit.is_moving = False
             self._attack(unit, enemy_unit, current_time_called)
         else:
+            if self.map.flow_fields is not None:
+                if isinstance(enemy_unit, Building):
+                    self.map.flow_fields.assign(unit, tuple(enemy_unit.position), free_tiles)
+                else:
+                    self.map.flow_fields.release(unit)  # A moving target would need a new field at every step
             self.move_unit(unit, int(target_x), int(target_y), current_time_called)
 
     
     def _attack(self, unit, enemy_unit, current_time_called):
         unit.is_moving = False
+        if self.map.flow_fields is not None:
+            self.map.flow_fields.release(unit)
         if hasattr(unit, 'path'):
             del unit.path
         if hasattr(unit, 'last_move_time'):
@@ -502,6 +662,7 @@ class Action:
                     if not isinstance(enemy_unit, Building):
                         enemy_unit.is_attacked_by = unit
                         enemy_unit.task = "is_attacked"
+                        self._wake(enemy_unit, current_time_called)
 
                 unit.last_hit_time = current_time_called
         else:
@@ -657,4 +818,80 @@ class Action:
                     target.hp -= building.attack
                     target.is_attacked = True
                     self.debug_print(f"{building.name} is attacking {target.name}...", 'Red')
-                return True
\ No newline at end of file
+                return True
+
+
+# Movement Batch Class
+class MovementBatch:
+    """
+    Étape de déplacement groupée : toutes les unités planifiées par move_unit pendant une passe sont
+    avancées en une seule passe NumPy (vecteur vers le prochain point du chemin, normalisation,
+    distance vitesse * dt plafonnée, octant de direction). Seules les unités qui atteignent un point
+    du chemin ou changent de tuile repassent par du code Python.
+    """
+    MAX_STEP_TIME = 0.2  # Same limit as move_unit --> good for smooth movement
+
+    def __init__(self, action):
+        self.action = action
+        self.moves = {}  # unit -> (next_step, target, start)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def add(self, unit, next_step, target, start):
+        self.moves[unit] = (next_step, target, start)
+
+    def flush(self, current_time_called):
+        moves, self.moves = self.moves, {}
+        stores = {}
+        for unit, move in moves.items():
+            if unit.store.alive[unit.uid]:  # Skip units killed later in the pass
+                stores.setdefault(id(unit.store), []).append((unit, move))
+        for entries in stores.values():
+            self.advance(entries, current_time_called)
+
+    def advance(self, entries, current_time_called):
+        units = [unit for unit, _ in entries]
+        store = units[0].store
+        ids = np.fromiter((unit.uid for unit in units), dtype=np.intp, count=len(units))
+        steps = np.array([move[0] for _, move in entries], dtype=float).reshape(-1, 2)
+
+        x, y = store.x[ids], store.y[ids]
+        time_since_last_move = np.minimum(self.MAX_STEP_TIME, current_time_called - store.last_move_time[ids])
+        distance_to_move = store.speed[ids] * time_since_last_move
+
+        direction_x = steps[:, 0] - x
+        direction_y = steps[:, 1] - y
+        distance_to_next_step = np.hypot(direction_x, direction_y)
+
+        moving = distance_to_move > 0
+        reached = moving & (distance_to_move >= distance_to_next_step)
+        partial = moving & ~reached
+        scale = np.divide(distance_to_move, distance_to_next_step, out=np.zeros_like(distance_to_move), where=partial)
+
+        new_x = np.where(reached, steps[:, 0], x + direction_x * scale)
+        new_y = np.where(reached, steps[:, 1], y + direction_y * scale)
+        store.x[ids] = new_x
+        store.y[ids] = new_y
+        store.last_move_time[ids[moving]] = current_time_called
+
+        # Octant codes follow UnitStore.DIRECTIONS (same ranges as Action.get_direction)
+        angle = np.degrees(np.arctan2(direction_y, direction_x)) % 360
+        store.direction[ids[moving]] = (((angle + 22.5) // 45).astype(np.int16) % 8)[moving]
+
+        start_tile_x = np.array([move[2][0] for _, move in entries], dtype=np.intp)
+        start_tile_y = np.array([move[2][1] for _, move in entries], dtype=np.intp)
+        crossed = moving & ((new_x.astype(np.intp) != start_tile_x) | (new_y.astype(np.intp) != start_tile_y))
+
+        # Python work only for the units that reached a step of their path or changed tile
+        for i in np.flatnonzero(reached | crossed):
+            unit = units[i]
+            if reached[i]:
+                unit.path.pop(0)  # Remove the step from the path
+                if not unit.path:
+                    _, (target_x, target_y), (start_x, start_y) = entries[i][1]
+                    self.action._arrive(unit, target_x, target_y, start_x, start_y)
+                    continue
+            if crossed[i]:
+                _, _, (start_x, start_y) = entries[i][1]
+                self.action._update_tile(unit, start_x, start_y)
@@ -12,6 +12,7 @@ from Starter_File import global_speedS
 # Building Class
 class Building:
     global_speed = global_speedS
+    is_drop_point = False  # Villagers drop their resources around it
     def __init__(self, player, name, hp, build_time, cost, size=1, position=(0, 0)):
         self.player = player  # The player who owns the building
         self.name = name
@@ -33,12 +34,28 @@ class Building:
     @classmethod
     def place_starting_buildings(cls, game_map):
         num_players = len(players_list)
+        civilizations = [player.civilization for player in players_list]
+        cache = getattr(game_map, 'cache', None)
+
+        layout = cache.load_buildings(game_map, civilizations) if cache is not None else None
+        if layout is not None:
+            # Same map and same civilizations: reuse the positions found by a previous game
+            for player_index, building_name, x, y in layout:
+                player = players_list[player_index]
+                building_class = STARTING_BUILDING_CLASSES[building_name]
+                player.ai.decided_builds.append((x, y, building_class(player).size))
+                cls.spawn_building(player, x, y, building_class, game_map)
+            return
+
+        # Positions only depend on the map, so a cached layout gives the same game as a new search
+        rng = random.Random(getattr(game_map, 'seed', None))
+        layout = []
+
         map_center_x = game_map.width // 2
         map_center_y = game_map.height // 2
         radius = int(0.45 * min(game_map.width, game_map.height))  # 90% of half the map size
     
         angle_step = 360 // num_players  # Equal angular distance between town centers
-        random.seed()  # Explicitly seed the random number generator
 
         for i, player in enumerate(players_list):
             angle = math.radians(i * angle_step)
@@ -47,14 +64,15 @@ class Building:
 
             # Adjust the location if tile is not free
             while not game_map.is_area_free(town_center_x, town_center_y, TownCenter(player).size):
-                town_center_x += random.choice([-1, 0, 1])
-                town_center_y += random.choice([-1, 0, 1])
+                town_center_x += rng.choice([-1, 0, 1])
+                town_center_y += rng.choice([-1, 0, 1])
 
             if game_map.is_area_free(town_center_x, town_center_y, TownCenter(player).size):
                 # Create an instance of Building (or TownCenter) to call spawn_building
                 building_instance = TownCenter(player)
                 player.ai.decided_builds.append((town_center_x, town_center_y, TownCenter(player).size))
                 building_instance.spawn_building(player, town_center_x, town_center_y, TownCenter, game_map)
+                layout.append((i, "TownCenter", town_center_x, town_center_y))
 
                 # Check if the civilization is Marines
                 if player.civilization == "Marines":
@@ -70,12 +88,13 @@ class Building:
                         new_y = town_center_y + offset_y
 
                         while not game_map.is_area_free(new_x, new_y, building(player).size):
-                            new_x += random.choice([-1, 0, 1])
-                            new_y += random.choice([-1, 0, 1])
+                            new_x += rng.choice([-1, 0, 1])
+                            new_y += rng.choice([-1, 0, 1])
 
                         # Spawn the building with the map passed in
                         player.ai.decided_builds.append((new_x, new_y, building(player).size))
                         building_instance.spawn_building(player, new_x, new_y, building, game_map)
+                        layout.append((i, building.__name__, new_x, new_y))
 
                     debug_print(f"Placed additional buildings for {player.name} (Marines) around ({town_center_x}, {town_center_y})", 'Blue')
                 else:
@@ -83,6 +102,9 @@ class Building:
             else:
                 debug_print(f"Failed to place starting town center at ({town_center_x}, {town_center_y})", 'Yellow')
 
+        if cache is not None:
+            cache.store_buildings(game_map, civilizations, layout)
+
     @classmethod
     def spawn_building(self, player, x, y, building_class, game_map):
         if not game_map.is_area_free(x, y, building_class(player).size):
@@ -91,7 +113,7 @@ class Building:
         building = building_class(player)
         building.position = (x, y)
         game_map.place_building(x, y, building)  # Use the passed map instead of cls.map
-        player.buildings.append(building)  # Add the building to the player's list of buildings
+        player.add_building(building)  # Add the building to the player's list of buildings and registries
         #debug_print(f"Building {building.name} belonging to {player.name} at ({x}, {y}) spawned.")
 
     @classmethod
@@ -99,7 +121,11 @@ class Building:
         if building_to_kill in player.buildings:
             if building_to_kill.position in player.ai.decided_builds and not building_to_kill.name == "Construct":
                 player.ai.decided_builds.remove(building_to_kill.position)
-            player.buildings.remove(building_to_kill)
+            player.remove_building(building_to_kill)
+            if game_map.scheduler is not None:
+                game_map.scheduler.cancel(building_to_kill)
+            if game_map.routes is not None:
+                game_map.routes.forget(tuple(building_to_kill.position))
             x, y = building_to_kill.position
             game_map.remove_building(int(x), int(y), building_to_kill)  # Assuming game_map is a property of the player
             debug_print(f"Building {building_to_kill} belonging to {player.name} at ({x}, {y}) killed.", 'DarkBlue')
@@ -109,6 +135,7 @@ class Building:
 
 # TownCenter Class
 class TownCenter(Building):
+    is_drop_point = True
     def __init__(self, player):
         super().__init__(player, "Town Center", hp=1000, build_time=15 / Building.global_speed, cost={"Wood": 350}, size=4)
         self.symbol = 'T'
@@ -155,6 +182,7 @@ class House(Building):
 
 # Camp Class
 class Camp(Building):
+    is_drop_point = True
     def __init__(self, player):
         super().__init__(player, "Camp", hp=200, build_time=25 / Building.global_speed, cost={"Wood": 100}, size=2)
         self.symbol = 'C'
@@ -286,3 +314,6 @@ class Construct(Building):
     def is_walkable(self):
         return False
 
+
+# Buildings a player can start with, by class name (starting layouts of the map cache)
+STARTING_BUILDING_CLASSES = {cls.__name__: cls for cls in (TownCenter, Barracks, Stable, ArcheryRange)}
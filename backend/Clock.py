@@ -0,0 +1,36 @@
+#Clock.py
+
+# Simulation Clock Class
+class SimulationClock:
+    """
+    Horloge simulée de la partie : toute la logique (IA, déplacements, récolte, construction,
+    entraînement) lit ce temps au lieu de time.time(), ce qui rend les parties reproductibles
+    et permet de simuler plus vite que le temps réel.
+    """
+    def __init__(self, dt=0.02, start_time=0.0):
+        self.dt = dt  # Durée simulée d'un tick en secondes (10 ticks = 0.2s, le pas maximal de move_unit)
+        self.time = start_time
+        self.ticks = 0
+        self.accumulator = 0.0  # Temps réel pas encore converti en ticks (mode interactif)
+
+    def now(self):
+        return self.time
+
+    def tick(self, dt=None):
+        """Avance l'horloge d'un pas fixe (ou de dt si fourni) et retourne le nouveau temps"""
+        self.time += self.dt if dt is None else dt
+        self.ticks += 1
+        return self.time
+
+    def pending_ticks(self, real_elapsed, max_ticks=5):
+        """
+        Convertit du temps réel écoulé en nombre de ticks fixes à jouer (boucle à pas fixe du mode interactif).
+        Le nombre de ticks est plafonné pour ne pas rattraper indéfiniment un retard.
+        """
+        self.accumulator += real_elapsed
+        ticks = int(self.accumulator // self.dt)
+        self.accumulator -= ticks * self.dt
+        if ticks > max_ticks:
+            ticks = max_ticks
+            self.accumulator = 0.0
+        return ticks
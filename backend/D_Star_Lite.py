@@ -0,0 +1,261 @@
+#D_Star_Lite.py
+
+import heapq
+from collections import OrderedDict
+
+from Actions import Action
+
+INFINITY = float('inf')
+
+
+# D* Lite Class
+class DStarLite:
+    """
+    Recherche D* Lite d'une unité vers une case (celle où elle rejoint son chemin, pour PathRepairs).
+    La recherche part de cette case : quand l'unité avance ou que des cases changent, seules les
+    distances touchées par ces changements sont recalculées au lieu de relancer une recherche.
+    Mêmes coûts (1 / 1.414) et même règle de praticabilité que le A* de Action.
+    """
+    def __init__(self, game_map, goal, start):
+        self.map = game_map
+        self.stride = game_map.stride
+        self.steps = [(dy * game_map.stride + dx, cost) for dx, dy, cost in Action.NEIGHBOR_STEPS]
+        self.goal = goal
+        self.goal_index = self.index(goal)
+        self.start_index = self.index(start)
+        self.last_start_index = self.start_index
+        self.km = 0  # Key modifier: grows with the distance the unit walked since the search started
+        self.g = {}
+        self.rhs = {self.goal_index: 0}
+        self.keys = {}  # index -> key it is queued with (older heap entries are ignored)
+        self.queue = []
+        self.changed = set()  # Tiles whose walkability changed since the last repair
+        self.push(self.goal_index)
+        self.expansions = 0
+
+    def index(self, tile):
+        return (tile[1] + 1) * self.stride + tile[0] + 1
+
+    def heuristic(self, a, b):
+        # Octile distance: admissible and consistent with the 1 / 1.414 move costs
+        dx = abs(a % self.stride - b % self.stride)
+        dy = abs(a // self.stride - b // self.stride)
+        return max(dx, dy) + 0.414 * min(dx, dy)
+
+    def key(self, index):
+        best = min(self.g.get(index, INFINITY), self.rhs.get(index, INFINITY))
+        return (best + self.heuristic(self.start_index, index) + self.km, best)
+
+    def push(self, index):
+        key = self.key(index)
+        self.keys[index] = key
+        heapq.heappush(self.queue, (key, index))
+
+    def update_vertex(self, index):
+        if index != self.goal_index:
+            walkable = self.map.walkable
+            g = self.g
+            best = INFINITY
+            for offset, move_cost in self.steps:
+                neighbor = index + offset
+                if walkable[neighbor]:
+                    cost = g.get(neighbor, INFINITY) + move_cost
+                    if cost < best:
+                        best = cost
+            self.rhs[index] = best
+        if self.g.get(index, INFINITY) != self.rhs.get(index, INFINITY):
+            self.push(index)
+        else:
+            self.keys.pop(index, None)
+
+    def update_neighbors(self, index):
+        # Blocked tiles (and the map border) are never on a path: only the unit's own tile can be one
+        walkable = self.map.walkable
+        for offset, _ in self.steps:
+            neighbor = index + offset
+            if walkable[neighbor] or neighbor == self.start_index:
+                self.update_vertex(neighbor)
+
+    def compute(self, max_expansions=None):
+        """
+        Met à jour les distances jusqu'à ce que celle de l'unité soit exacte.
+
+        :param max_expansions: Nombre maximum de cases développées, None pour aucune limite
+        :return: False si la limite a été atteinte avant la fin
+        """
+        g = self.g
+        rhs = self.rhs
+        queue = self.queue
+        keys = self.keys
+        start = self.start_index
+        expansions = 0
+        while queue:
+            key, index = queue[0]
+            if keys.get(index) != key:
+                heapq.heappop(queue)  # Outdated entry
+                continue
+            start_key = self.key(start)
+            if key >= start_key and rhs.get(start, INFINITY) == g.get(start, INFINITY):
+                break
+            if max_expansions is not None and expansions >= max_expansions:
+                self.expansions += expansions
+                return False
+            expansions += 1
+            heapq.heappop(queue)
+            new_key = self.key(index)
+            if key < new_key:
+                keys[index] = new_key
+                heapq.heappush(queue, (new_key, index))
+                continue
+            del keys[index]
+            if g.get(index, INFINITY) > rhs.get(index, INFINITY):
+                g[index] = rhs[index]
+            else:
+                g[index] = INFINITY
+                self.update_vertex(index)
+            # Only free tiles can be stepped on, so only their neighbours' distances depend on them
+            if self.map.walkable[index]:
+                self.update_neighbors(index)
+        self.expansions += expansions
+        return True
+
+    def repair(self, start, max_expansions=None):
+        """
+        Recalcule le chemin depuis start en tenant compte des cases changées depuis la dernière fois.
+
+        :return: Liste des cases de start (exclu) à la destination (incluse), None si elle est inaccessible,
+                 ou False si la réparation dépasse max_expansions
+        """
+        self.start_index = self.index(start)
+        self.km += self.heuristic(self.last_start_index, self.start_index)
+        self.last_start_index = self.start_index
+        walkable = self.map.walkable
+        for index in self.changed:
+            # The tile's walkability only changes the cost of the moves that end on it
+            if walkable[index]:
+                self.update_vertex(index)
+            self.update_neighbors(index)
+        self.changed = set()
+        if not self.compute(max_expansions):
+            return False
+        return self.path()
+
+    def path(self):
+        walkable = self.map.walkable
+        g = self.g
+        stride = self.stride
+        index = self.start_index
+        path = []
+        while index != self.goal_index:
+            best = None
+            best_cost = INFINITY
+            for offset, move_cost in self.steps:
+                neighbor = index + offset
+                if walkable[neighbor]:
+                    cost = g.get(neighbor, INFINITY) + move_cost
+                    if cost < best_cost:
+                        best, best_cost = neighbor, cost
+            if best is None or len(path) > len(g):
+                return None
+            index = best
+            path.append((index % stride - 1, index // stride - 1))
+        return path
+
+
+# Path Repairs Class
+class PathRepairs:
+    """
+    Réparation des chemins coupés : quand le pas suivant d'une unité devient bloqué, seul le tronçon
+    coupé est recalculé, par une recherche D* Lite de la case de l'unité jusqu'à la case du chemin
+    rejoin_steps pas plus loin ; la suite du chemin est gardée telle quelle. L'état D* Lite est
+    gardé tant que l'unité suit ce tronçon : la carte lui signale les cases qu'il a explorées, et
+    une nouvelle coupure ne met à jour que les distances touchées.
+
+    Une réparation qui développe plus de max_expansions cases, ou plus que le budget de cases du
+    tick, est abandonnée : l'unité refait alors une recherche complète (Action.plan_path).
+    """
+    def __init__(self, game_map, max_expansions=500, rejoin_steps=8, max_states=64):
+        self.map = game_map
+        self.max_expansions = max_expansions
+        self.rejoin_steps = rejoin_steps
+        self.max_states = max_states
+        self.states = OrderedDict()  # unit -> DStarLite towards the tile where it rejoins its path, least recently used first
+        self.searches = 0  # Cut stretches planned again from scratch
+        self.repairs = 0  # Incremental repairs of an existing state
+        self.fallbacks = 0
+        self.expansions = 0
+
+    def repair(self, unit, start, path):
+        """
+        :param path: Chemin coupé de l'unité, de start (exclu) à sa destination
+        :return: Chemin réparé de start à la destination, ou False si l'unité doit refaire une recherche complète
+        """
+        path_queue = self.map.path_queue
+        max_expansions = self.max_expansions
+        if path_queue is not None:
+            max_expansions = min(max_expansions, path_queue.allowance())
+        state = self.states.get(unit)
+        if state is not None and state.goal in path and self.is_free(state.goal):
+            self.repairs += 1
+        else:
+            rejoin = self.rejoin_tile(path)
+            if rejoin is None:
+                self.release(unit)
+                self.fallbacks += 1
+                return False
+            state = DStarLite(self.map, rejoin, start)
+            self.states[unit] = state
+            while len(self.states) > self.max_states:
+                self.states.popitem(last=False)
+            self.searches += 1
+        rest = path[path.index(state.goal) + 1:]
+        repaired = state.repair(start, max_expansions)
+        self.expansions += state.expansions
+        if path_queue is not None:
+            path_queue.spend(state.expansions)
+        state.expansions = 0
+        if not repaired:
+            # Too many distances to update, or the cut cannot be walked around before rejoin: full search
+            del self.states[unit]
+            self.fallbacks += 1
+            return False
+        self.states.move_to_end(unit)
+        return repaired + rest
+
+    def rejoin_tile(self, path):
+        # First free tile of the path from rejoin_steps steps on: the stretch before it is planned again
+        for tile in path[min(self.rejoin_steps, len(path) - 1):]:
+            if self.is_free(tile):
+                return tile
+        return None
+
+    def is_free(self, tile):
+        return self.map.walkable[(tile[1] + 1) * self.map.stride + tile[0] + 1] == 1
+
+    def release(self, unit):
+        self.states.pop(unit, None)
+
+    def tile_changed(self, x, y, walkable):
+        # Only the units still on a repaired stretch have a state: at most max_states, usually none
+        index = (y + 1) * self.map.stride + x + 1
+        for state in self.states.values():
+            if index in state.rhs or index in state.g:
+                state.changed.add(index)
+            else:
+                # A tile next to the explored area can open a shorter way into it
+                for offset, _ in state.steps:
+                    if index + offset in state.g:
+                        state.changed.add(index)
+                        break
+
+    def reset(self):
+        self.states.clear()
+
+    def stats(self):
+        return {
+            'searches': self.searches,
+            'repairs': self.repairs,
+            'fallbacks': self.fallbacks,
+            'states': len(self.states),
+            'expansions': self.expansions,
+        }
@@ -0,0 +1,252 @@
+#Flow_Field.py
+
+import heapq
+from array import array
+from collections import OrderedDict
+
+from Actions import Action
+
+
+# Flow Field Class
+class FlowField:
+    """
+    Champ d'intégration d'un ensemble de destinations (les cases autour d'un bâtiment) : distance
+    de chaque case à la destination la plus proche, calculée par un Dijkstra partant des
+    destinations. Le Dijkstra est repris à la demande, juste assez loin pour couvrir les unités
+    qui le consultent, sur le budget de cases du tick (PathQueue.allowance) : ce qui n'a pas pu
+    être développé l'est au tick suivant. Il ne part pas si aucune destination n'est dans la
+    région de l'unité, qu'il parcourrait sinon en entier.
+    """
+    def __init__(self, game_map, goals):
+        self.map = game_map
+        self.goals = list(goals)
+        self.steps = [(dy * game_map.stride + dx, cost) for dx, dy, cost in Action.NEIGHBOR_STEPS]
+        self.distance = array('d', [float('inf')]) * len(game_map.walkable)
+        self.goal_indices = {(goal[1] + 1) * game_map.stride + goal[0] + 1 for goal in self.goals}
+        self.heap = []
+        for goal_index in self.goal_indices:
+            self.distance[goal_index] = 0
+            self.heap.append((0, goal_index))
+        heapq.heapify(self.heap)
+
+    def settle(self, index, max_expansions=float('inf')):
+        """
+        Poursuit le Dijkstra jusqu'à ce que la distance de index soit définitive, ou que max_expansions
+        cases aient été développées.
+
+        :return: Nombre de cases développées
+        """
+        distance = self.distance
+        heap = self.heap
+        walkable = self.map.walkable
+        steps = self.steps
+        expansions = 0
+        while heap and heap[0][0] < distance[index] and expansions < max_expansions:
+            cost, current = heapq.heappop(heap)
+            if cost != distance[current]:
+                continue  # Stale entry: the tile was lowered or repaired since
+            expansions += 1
+            for offset, move_cost in steps:
+                neighbor = current + offset
+                if walkable[neighbor]:
+                    new_cost = cost + move_cost
+                    if new_cost < distance[neighbor]:
+                        distance[neighbor] = new_cost
+                        heapq.heappush(heap, (new_cost, neighbor))
+        return expansions
+
+    def settled(self, index):
+        heap = self.heap
+        while heap and heap[0][0] != self.distance[heap[0][1]]:
+            heapq.heappop(heap)
+        return not heap or heap[0][0] >= self.distance[index]
+
+    def path(self, start, path_queue=None):
+        """
+        Descend le gradient du champ depuis start.
+
+        :param path_queue: PathQueue dont le budget du tick paie le Dijkstra (None : sans limite)
+        :return: (True, liste des cases de start (exclu) à la destination la plus proche (incluse)),
+                 (True, None) si aucune n'est accessible, (False, None) si le budget du tick est épuisé
+        """
+        regions = self.map.regions
+        if regions is not None and not any(regions.reachable(start, goal) for goal in self.goals):
+            return True, None
+        stride = self.map.stride
+        walkable = self.map.walkable
+        distance = self.distance
+        index = (start[1] + 1) * stride + start[0] + 1
+        # A unit standing on a blocked tile can still step onto a free neighbour
+        first_steps = [index + offset for offset, _ in self.steps if walkable[index + offset]] if not walkable[index] else [index]
+        allowance = path_queue.allowance() if path_queue is not None else float('inf')
+        for step_index in first_steps:
+            expansions = self.settle(step_index, allowance)
+            allowance -= expansions
+            if path_queue is not None:
+                path_queue.spend(expansions)
+        if not all(self.settled(step_index) for step_index in first_steps):
+            return False, None
+        if all(distance[step_index] == float('inf') for step_index in first_steps):
+            return True, None
+
+        path = []
+        while distance[index] != 0:
+            best = None
+            best_cost = distance[index]
+            for offset, move_cost in self.steps:
+                neighbor = index + offset
+                if walkable[neighbor] and distance[neighbor] + move_cost <= best_cost:
+                    best, best_cost = neighbor, distance[neighbor] + move_cost
+            if best is None:
+                return True, None
+            index = best
+            path.append((index % stride - 1, index // stride - 1))
+        return True, path
+
+    def tile_freed(self, index):
+        # Distances can only decrease: lower the tile's own and let the Dijkstra spread it
+        if index in self.goal_indices:
+            best = 0
+        else:
+            best = min(self.distance[index + offset] + move_cost for offset, move_cost in self.steps)
+        if best < self.distance[index]:
+            self.distance[index] = best
+            heapq.heappush(self.heap, (best, index))
+
+    def tile_blocked(self, index, max_tiles=float('inf')):
+        """
+        Répare le champ sur place après le blocage de la case index : seules les cases dont la distance
+        passait par elle sont remises à l'infini, puis reprises par le Dijkstra depuis leurs voisines.
+
+        :param max_tiles: Nombre de cases dépendantes au-delà duquel la réparation est abandonnée
+        :return: Nombre de cases remises à l'infini, ou None s'il dépassait max_tiles (champ à reconstruire)
+        """
+        distance = self.distance
+        steps = self.steps
+        if distance[index] == float('inf'):
+            return 0
+        # Every finite distance is at least a neighbour's plus the step: the tiles left without such a
+        # neighbour outside the affected ones were reached through index. Closest first, so that a
+        # tile's neighbours that could still reach it are sorted out before it
+        affected = set()
+        pending = [(distance[index], index)]
+        while pending:
+            cost, current = heapq.heappop(pending)
+            if current in affected:
+                continue
+            if current != index and any(
+                distance[current - offset] + move_cost <= cost and current - offset not in affected
+                for offset, move_cost in steps
+            ):
+                continue  # Still reached as fast through another tile
+            affected.add(current)
+            if len(affected) > max_tiles:
+                return None
+            for offset, move_cost in steps:
+                child = current + offset
+                if child not in affected and cost + move_cost <= distance[child] != float('inf'):
+                    heapq.heappush(pending, (distance[child], child))
+
+        for current in affected:
+            distance[current] = float('inf')
+        walkable = self.map.walkable
+        for current in affected:
+            if not walkable[current]:
+                continue
+            best = min(distance[current + offset] + move_cost for offset, move_cost in steps)
+            if best != float('inf'):
+                distance[current] = best
+                heapq.heappush(self.heap, (best, current))
+        return len(affected)
+
+
+# Flow Field Cache Class
+class FlowFieldCache:
+    """
+    Champs de flux partagés par les unités attaquant le même bâtiment (IA.attack, IA.group_attack).
+    Un champ n'est créé qu'à partir de min_units unités en route vers le même bâtiment : chacune
+    suit alors le gradient du champ au lieu de lancer son propre A*, et le coût d'un déplacement
+    d'armée dépend du nombre de cibles plutôt que du nombre d'unités. Le champ mène à la case
+    libre la plus proche autour du bâtiment, pas forcément à celle réservée par l'unité.
+
+    Une case libérée ne fait qu'abaisser des distances et est réparée sur place ; une case
+    bloquée sur le champ déjà exploré l'invalide, il est reconstruit à la demande suivante.
+    """
+    def __init__(self, game_map, min_units=10, max_fields=32):
+        self.map = game_map
+        self.min_units = min_units
+        self.max_fields = max_fields
+        self.fields = OrderedDict()  # target -> FlowField, least recently used first
+        self.heading = {}  # unit -> target it is heading to
+        self.goals = {}  # target -> tiles around it, fixed by the first unit heading to it
+        self.demand = {}  # target -> number of units heading to it
+        self.builds = 0
+        self.paths = 0
+        self.invalidations = 0
+
+    def assign(self, unit, target, goals):
+        """
+        :param target: Position du bâtiment visé
+        :param goals: Cases libres autour du bâtiment
+        """
+        old_target = self.heading.get(unit)
+        if old_target == target:
+            return
+        if old_target is not None:
+            self.release(unit)
+        self.heading[unit] = target
+        if target not in self.demand:
+            self.goals[target] = tuple(goals)
+        self.demand[target] = self.demand.get(target, 0) + 1
+
+    def release(self, unit):
+        target = self.heading.pop(unit, None)
+        if target is None:
+            return
+        self.demand[target] -= 1
+        if not self.demand[target]:
+            del self.demand[target]
+            del self.goals[target]
+
+    def leads_to(self, unit, goal):
+        target = self.heading.get(unit)
+        return target is not None and goal in self.goals[target]
+
+    def path(self, unit, start):
+        """
+        :return: (True, chemin de start à la case la plus proche autour du bâtiment visé par unit, tiré
+                 du champ de ce bâtiment, ou None si l'unité doit faire son propre A*), ou (False, None)
+                 si le budget du tick est épuisé avant que le champ atteigne l'unité
+        """
+        target = self.heading.get(unit)
+        if target is None:
+            return True, None
+        field = self.fields.get(target)
+        if field is None:
+            if self.demand[target] < self.min_units:
+                return True, None
+            field = FlowField(self.map, self.goals[target])
+            self.fields[target] = field
+            self.builds += 1
+            while len(self.fields) > self.max_fields:
+                self.fields.popitem(last=False)
+        self.fields.move_to_end(target)
+        ready, path = field.path(start, self.map.path_queue)
+        if path:
+            self.paths += 1
+        return ready, path
+
+    def tile_changed(self, x, y, walkable):
+        index = (y + 1) * self.map.stride + x + 1
+        for target, field in list(self.fields.items()):
+            if walkable:
+                field.tile_freed(index)
+            elif field.distance[index] != float('inf'):
+                del self.fields[target]
+                self.invalidations += 1
+
+    def reset(self):
+        self.fields.clear()
+
+    def stats(self):
+        return {'fields': len(self.fields), 'builds': self.builds, 'paths': self.paths, 'invalidations': self.invalidations}
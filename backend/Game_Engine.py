@@ -1,5 +1,6 @@
 import curses
 import time
+import random
 import pickle
 import os
 import tkinter as tk
@@ -7,6 +8,7 @@ import tkinter as tk
 from queue import Queue
 from frontend.gui import GUI
 
+import config
 from logger import debug_print
 from Units import *
 from Building import *
@@ -20,22 +22,45 @@ except ImportError:
     debug_print("Pygame not installed; running without Pygame features such as 2.5D map view.")
 
 from html_report import generate_html_report
+from Clock import SimulationClock
+from Map_Cache import MapCache
+from Path_Cache import PathCache
+from Regions import ConnectedRegions
+from Hierarchical_Path import HierarchicalPathfinder
+from Jump_Point_Search import JumpPointSearch
+from Flow_Field import FlowFieldCache
+from D_Star_Lite import PathRepairs
+from Reservations import ReservationTable
+from Routes import RouteTable
+from Path_Queue import PathQueue
+from Path_Workers import PathWorkerPool
+from Scheduler import TickScheduler
 
 from IA import IA
 
 # GameEngine Class
 class GameEngine:
-    def __init__(self, game_mode, map_size, players, sauvegarde=False):
+    def __init__(self, game_mode, map_size, players, sauvegarde=False, seed=None, map_cache=None):
         self.game_mode = game_mode
         self.map_size = map_size
         self.players = players
-        self.map = Map(*map_size)  # Create a map object
+        self.seed = seed
+        if seed is not None:
+            random.seed(seed)  # Same seed + same settings = same game
+        self.clock = SimulationClock()  # Simulated time used by all the game logic
+        Unit.current_store = UnitStore()  # Columnar storage of this game's units
+        if map_cache is None and seed is not None and config.map_cache_dir:
+            map_cache = MapCache()  # Seeded maps are the same every time: generate them only once
+        self.map = Map(*map_size, game_mode=game_mode, seed=seed, cache=map_cache)  # Create a map object
+        self.scheduler = TickScheduler()  # Units and buildings waiting for their next update
+        self.map.scheduler = self.scheduler
+        self.attach_pathfinding()
         self.turn = 0
         self.is_paused = False  # Flag to track if the game is paused
         self.changed_tiles = set()  # Set to track changed tiles
         
         # IA related attributes
-        self.ias = [IA(player, player.ai_profile, self.map, time.time()) for player in self.players]  # Instantiate IA for each player
+        self.ias = [IA(player, player.ai_profile, self.map, self.clock.now()) for player in self.players]  # Instantiate IA for each player
         for i in range(len(self.players)):
             self.players[i].ai = self.ias[i]
         self.IA_used = False
@@ -46,7 +71,6 @@ class GameEngine:
             Unit.place_starting_units(self.players, self.map)  # Place starting units on the map
         
         self.debug_print = debug_print
-        self.current_time = time.time()
 
         self.terminalon = True
 
@@ -55,6 +79,35 @@ class GameEngine:
         self.data_queue = Queue()
         self.gui_thread = None
 
+    def attach_pathfinding(self):
+        """Crée les structures de pathfinding de la carte, tenues à jour à chaque changement de praticabilité"""
+        self.map.path_cache = PathCache()  # Paths shared by the units, forgotten when a tile on them changes
+        self.map.regions = ConnectedRegions(self.map)  # Lets the pathfinding reject unreachable goals at once
+        self.map.flow_fields = FlowFieldCache(self.map, config.flow_field_min_units)  # Shared by the units attacking the same target
+        self.map.path_repairs = PathRepairs(self.map, config.repair_max_expansions)  # Units whose path was cut repair only the cut stretch
+        self.map.reservations = ReservationTable(config.reservation_penalty, config.detour_max_expansions)  # Tiles the moving units will cross, and when
+        self.map.routes = RouteTable(self.map)  # Villagers' trips to and from the drop points
+        self.map.walkability_listeners = [self.map.path_cache, self.map.regions, self.map.flow_fields, self.map.path_repairs, self.map.routes]
+        # Searches spread over the ticks under a node budget (grid A* only: HPA* and JPS searches are not split)
+        if getattr(self, 'path_workers', None) is not None:
+            self.path_workers.close()  # Workers of the game replaced by a loaded save
+        self.path_workers = None
+        if config.path_workers:
+            # Searches too long for the budget go to worker processes instead
+            self.path_workers = PathWorkerPool(self.map, config.path_workers, config.path_node_budget or 0)
+            self.map.path_queue = self.path_workers
+            self.map.walkability_listeners.append(self.path_workers)
+        else:
+            self.map.path_queue = PathQueue(self.map, config.path_node_budget) if config.path_node_budget else None
+        if config.pathfinder == "hpa":
+            self.map.pathfinder = HierarchicalPathfinder(self.map, config.hpa_cluster_size)
+        elif config.pathfinder == "jps":
+            self.map.pathfinder = JumpPointSearch(self.map)
+        else:
+            self.map.pathfinder = None
+        if self.map.pathfinder is not None:
+            self.map.walkability_listeners.append(self.map.pathfinder)
+
     def start_gui_thread(self):
         """Initialize and start the GUI thread"""
         if not self.gui_thread:
@@ -76,10 +129,145 @@ class GameEngine:
             self.data_queue.put(self)
 
     def get_current_time(self):
-        """Retourne le temps actuel si le jeu n'est pas en pause"""
+        """Retourne le temps simulé du tick en cours (figé si le jeu est en pause)"""
+        return self.clock.now()
+
+    def step(self, dt=None):
+        """
+        Avance la simulation d'un tick : IA, déplacements, entraînement et Keeps, sans aucun affichage.
+
+        :param dt: Durée simulée du tick en secondes (par défaut le pas fixe de l'horloge)
+        """
         if not self.is_paused:
-            return time.time()
-        return self.current_time
+            # Avancer l'horloge simulée au début de chaque tick
+            self.clock.tick(dt)
+
+            action = Action(self.map, movement_batch=True)
+            if self.map.path_queue is not None:
+                # New node budget, spent first on the searches units are already waiting for
+                self.map.path_queue.run()
+
+            #call the IA
+            if self.turn % 200 == 0 and self.IA_used == True: # Call the IA every 5 turns: change 0, 5, 10, 15, ... depending on lag
+                for ia in self.ias:
+                    ia.current_time_called = self.get_current_time()  # Update the current time for each IA
+                    ia.run()  # Run the AI logic for each player
+
+            if self.turn % 200 == 0:
+                # Pick up the tasks given outside the scheduler (IA decisions, new training queues, new Keeps)
+                self.scheduler.sync(self.players, self.get_current_time())
+
+            if self.turn % 10 == 0:
+                # Only update the units and buildings whose next update is due
+                current_time = self.get_current_time()
+                due = self.scheduler.pop_due(current_time)
+                keep_targets = self.find_keep_targets([entity for entity in due if type(entity).__name__ == "Keep"])
+                for entity in due:
+                    if entity.hp <= 0:
+                        continue  # Killed earlier in this pass
+                    if isinstance(entity, Unit):
+                        self.update_unit(entity, action)
+                    else:
+                        self.update_building(entity, action, keep_targets)
+                    wake_time = self.scheduler.next_update_time(entity, current_time, self.map)
+                    if wake_time is not None:
+                        self.scheduler.schedule(entity, wake_time)
+                # Advance every unit that planned a move during the pass in one array operation
+                action.flush_moves(current_time)
+
+        self.turn += 1
+
+    def update_unit(self, unit, action):
+        # Move units toward their target position
+        player = unit.player
+        if unit.task == "going_to_battle":
+            action.go_battle(unit, unit.target_attack, self.get_current_time())
+        elif unit.task == "attacking":
+            action._attack(unit, unit.target_attack, self.get_current_time())
+        elif unit.target_position:
+            target_x, target_y = unit.target_position
+            action.move_unit(unit, target_x, target_y, self.get_current_time())
+        elif unit.task == "gathering" or unit.task == "returning":
+            action._gather(unit, unit.last_gathered, self.get_current_time())
+        elif unit.task == "marching":
+            action.gather_resources(unit, unit.last_gathered, self.get_current_time())
+        elif unit.task == "is_attacked":
+            action._attack(unit, unit.is_attacked_by, self.get_current_time())
+        elif unit.task == "going_to_construction_site":
+            action.construct_building(unit, unit.construction_type, unit.target_building[0], unit.target_building[1], player, self.get_current_time())
+        elif unit.task == "constructing":
+            action._construct(unit, unit.construction_type, unit.target_building[0], unit.target_building[1], player, self.get_current_time())
+
+    def update_building(self, building, action, keep_targets=None):
+        player = building.player
+        if hasattr(building, 'training_queue') and building.training_queue != []:
+            unit = building.training_queue[0]
+            Unit.train_unit(unit, unit.spawn_position[0], unit.spawn_position[1], player, unit.spawn_building, self.map, self.get_current_time())
+        elif type(building).__name__ == "Keep":
+            closest_enemy = keep_targets.get(building) if keep_targets is not None else None
+            if keep_targets is None or building not in keep_targets or (closest_enemy is not None and closest_enemy.hp <= 0):
+                # Not looked up with the other Keeps of the pass, or its target was killed earlier in it
+                closest_enemy = IA.find_nearest_enemies(building.player.ai, [building.position], building.range)[0]
+            if closest_enemy is not None:
+                action.attack_target(building, target=closest_enemy, current_time_called=self.get_current_time(), game_map=self.map)
+            else: 
+                building.target = None
+
+    def find_keep_targets(self, keeps):
+        """Plus proche ennemi à portée de chaque Keep, en une requête par joueur"""
+        keep_targets = {}
+        groups = {}
+        for keep in keeps:
+            groups.setdefault((keep.player, keep.range), []).append(keep)
+        for (player, max_distance), player_keeps in groups.items():
+            closest_enemies = player.ai.find_nearest_enemies([keep.position for keep in player_keeps], max_distance)
+            keep_targets.update(zip(player_keeps, closest_enemies))
+        return keep_targets
+
+    def run_headless(self, max_ticks=None, dt=None):
+        """
+        Fait tourner la partie sans terminal (serveur sans affichage), aussi vite que le CPU le permet.
+
+        :param max_ticks: Nombre maximal de ticks (None = jusqu'à la victoire)
+        :param dt: Durée simulée d'un tick en secondes (par défaut le pas fixe de l'horloge)
+        :return: Dictionnaire avec le nombre de ticks, la durée réelle et simulée, les ticks par seconde et le gagnant
+        """
+        self.IA_used = True
+        self.is_paused = False
+        self.terminalon = False
+
+        start = time.perf_counter()
+        ticks = 0
+        try:
+            while not self.check_victory() and (max_ticks is None or ticks < max_ticks):
+                self.step(dt)
+                ticks += 1
+        except KeyboardInterrupt:
+            self.debug_print("Headless game interrupted. Exiting...", 'Yellow')
+        elapsed = time.perf_counter() - start
+
+        active_players = [p for p in self.players if p.units or p.buildings]
+        winner = active_players[0].name if len(active_players) == 1 else None
+        if winner:
+            self.debug_print(f"Player {winner} wins the game!", 'Magenta')
+
+        stats = {
+            'ticks': ticks,
+            'elapsed': elapsed,
+            'sim_time': self.clock.now(),
+            'ticks_per_second': ticks / elapsed if elapsed > 0 else float('inf'),
+            'winner': winner,
+            'path_cache': self.map.path_cache.stats(),
+            'unreachable_rejected': self.map.regions.rejections,
+            'flow_fields': self.map.flow_fields.stats(),
+            'path_repairs': self.map.path_repairs.stats(),
+            'path_queue': self.map.path_queue.stats() if self.map.path_queue is not None else None,
+            'reservations': self.map.reservations.stats(),
+            'routes': self.map.routes.stats(),
+        }
+        if self.path_workers is not None:
+            self.path_workers.close()
+        return stats
 
     def run(self, stdscr):
         # Initialize the starting view position
@@ -91,12 +279,9 @@ class GameEngine:
         if self.terminalon :
             self.map.display_viewport(stdscr, top_left_x, top_left_y, viewport_width, viewport_height, Map_is_paused=self.is_paused)  # Display the initial viewport
 
+        last_frame_time = time.perf_counter()
         try:
             while not self.check_victory():
-                # Mettre à jour current_time au début de chaque itération si le jeu n'est pas en pause
-                if not self.is_paused:
-                    self.current_time = time.time()
-
                 # Handle input
                 curses.curs_set(0)  # Hide cursor
                 stdscr.nodelay(True)  # Make getch() non-blocking
@@ -195,45 +380,11 @@ class GameEngine:
                     else:
                         self.debug_print("No save files found.")
 
-                #call the IA
-                if not self.is_paused and self.turn % 200 == 0 and self.IA_used == True: # Call the IA every 5 turns: change 0, 5, 10, 15, ... depending on lag
-                    for ia in self.ias:
-                        ia.current_time_called = self.get_current_time()  # Update the current time for each IA
-                        ia.run()  # Run the AI logic for each player
-                    
-                if not self.is_paused and self.turn % 10 == 0:
-                    # Move units toward their target position
-                    for player in self.players:
-                        for unit in player.units:
-                            if unit.task == "going_to_battle":
-                                action.go_battle(unit, unit.target_attack, self.get_current_time())
-                            elif unit.task == "attacking":
-                                action._attack(unit, unit.target_attack, self.get_current_time())
-                            elif unit.target_position:
-                                target_x, target_y = unit.target_position
-                                action.move_unit(unit, target_x, target_y, self.get_current_time())
-                            elif unit.task == "gathering" or unit.task == "returning":
-                                action._gather(unit, unit.last_gathered, self.get_current_time())
-                            elif unit.task == "marching":
-                                action.gather_resources(unit, unit.last_gathered, self.get_current_time())
-                            elif unit.task == "is_attacked":
-                                action._attack(unit, unit.is_attacked_by, self.get_current_time())
-                            elif unit.task == "going_to_construction_site":
-                                action.construct_building(unit, unit.construction_type, unit.target_building[0], unit.target_building[1], player, self.get_current_time())
-                            elif unit.task == "constructing":
-                                action._construct(unit, unit.construction_type, unit.target_building[0], unit.target_building[1], player, self.get_current_time())
-                        for building in player.buildings:
-                            if hasattr(building, 'training_queue') and building.training_queue != []:
-                                unit = building.training_queue[0]
-                                Unit.train_unit(unit, unit.spawn_position[0], unit.spawn_position[1], player, unit.spawn_building, self.map, self.get_current_time())
-                            elif type(building).__name__ == "Keep":
-                                nearby_enemies = IA.find_nearby_enemies(building.player.ai, max_distance=building.range, unit_position=building.position)  # 5 tile radius
-                                if nearby_enemies:
-                                    closest_enemy = min(nearby_enemies, 
-                                        key=lambda e: IA.calculate_distance(building.player.ai, pos1=unit.position, pos2=e.position))
-                                    action.attack_target(building, target=closest_enemy, current_time_called=self.current_time, game_map=self.map)
-                                else: 
-                                    building.target = None
+                # Jouer autant de ticks fixes que le temps réel écoulé le permet
+                now = time.perf_counter()
+                for _ in range(self.clock.pending_ticks(now - last_frame_time)):
+                    self.step()
+                last_frame_time = now
 
                 # Clear the screen and display the new part of the map after moving
                 stdscr.clear()
@@ -244,8 +395,6 @@ class GameEngine:
                 if self.gui_running:
                     self.update_gui()
 
-                self.turn += 1
-
             active_players = [p for p in self.players if p.units or p.buildings]
             self.debug_print(f"Player {active_players[0].name} wins the game!", 'Magenta')
             input("Press Enter to exit...")
@@ -312,7 +461,9 @@ class GameEngine:
                     'turn': self.turn,
                     'is_paused': self.is_paused,
                     'changed_tiles': self.changed_tiles,
-                    'ias': self.ias  # Add self.ias to the saved state
+                    'ias': self.ias,  # Add self.ias to the saved state
+                    'clock': self.clock,
+                    'unit_store': Unit.current_store
                 }
                 pickle.dump(game_state, f)
             self.debug_print(f"Game saved to {filename}.")
@@ -333,7 +484,19 @@ class GameEngine:
                 self.is_paused = game_state['is_paused']
                 self.changed_tiles = game_state['changed_tiles']
                 self.ias = game_state.get('ias', None)  # Load self.ias or set it to None if missing
-                self.current_time = time.time()
+                # Old saves were timed with time.time(): resume the clock from the wall clock so their timers stay valid
+                self.clock = game_state.get('clock', SimulationClock(start_time=time.time()))
+                Unit.current_store = game_state.get('unit_store', Unit.current_store)
+                for player in self.players:
+                    if not hasattr(player, 'buildings_by_type'):
+                        # Saves made before the building registries
+                        player.index_buildings()
+                if self.map.spatial_hash is None:
+                    self.map.index_entities()  # Saves made before the spatial hash
+                self.scheduler = TickScheduler()
+                self.map.scheduler = self.scheduler
+                self.attach_pathfinding()
+                self.scheduler.sync(self.players, self.get_current_time())
             self.debug_print(f"Game loaded from {filename}.")
         except Exception as e:
             self.debug_print(f"Error loading game: {e}")
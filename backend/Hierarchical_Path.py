@@ -0,0 +1,299 @@
+#Hierarchical_Path.py
+
+import heapq
+import math
+
+from Actions import Action
+
+
+# Hierarchical Pathfinder Class
+class HierarchicalPathfinder:
+    """
+    Pathfinding hiérarchique (HPA*) : la carte est découpée en clusters carrés reliés par des
+    entrées sur leurs bords. Un trajet est d'abord planifié sur le graphe des entrées, puis
+    seuls les segments à l'intérieur de chaque cluster traversé sont calculés case par case.
+
+    Les entrées d'un cluster sont recalculées quand une de ses cases change, et les distances
+    entre entrées d'un cluster ne sont calculées que lorsqu'une recherche le traverse.
+    """
+    MAX_SINGLE_ENTRANCE = 6  # Border openings longer than this get an entrance at each end
+
+    def __init__(self, game_map, cluster_size=16):
+        self.map = game_map
+        self.size = cluster_size
+        self.clusters_x = math.ceil(game_map.width / cluster_size)
+        self.clusters_y = math.ceil(game_map.height / cluster_size)
+        self.borders = {}  # (cluster, neighbour cluster) -> [(tile, tile across the border)]
+        self.partners = {}  # entrance tile -> entrance tiles across the border
+        self.cluster_nodes = {}  # cluster -> entrance tiles on its side
+        self.intra = {}  # cluster -> {node: ({other node: cost}, path tree)}, filled on demand
+        self.grids = {}  # cluster -> local copy of its walkability
+        self.dirty = set()  # Clusters whose entrances must be recomputed
+        self.searches = 0
+        self.fallbacks = 0
+        self.reset()
+
+    def reset(self):
+        self.borders.clear()
+        self.partners.clear()
+        self.cluster_nodes = {cluster: set() for cluster in self.clusters()}
+        self.intra.clear()
+        self.grids.clear()
+        self.dirty = set(self.clusters())
+
+    def clusters(self):
+        return [(cx, cy) for cy in range(self.clusters_y) for cx in range(self.clusters_x)]
+
+    def cluster_of(self, x, y):
+        return (x // self.size, y // self.size)
+
+    def bounds(self, cluster):
+        cx, cy = cluster
+        return (
+            cx * self.size, cy * self.size,
+            min((cx + 1) * self.size, self.map.width), min((cy + 1) * self.size, self.map.height)
+        )
+
+    def tile_changed(self, x, y, walkable):
+        cluster = self.cluster_of(x, y)
+        self.dirty.add(cluster)
+        self.intra.pop(cluster, None)
+        self.grids.pop(cluster, None)
+
+    def is_walkable(self, x, y):
+        return self.map.walkable[(y + 1) * self.map.stride + x + 1]
+
+    def compute_border(self, cluster, other):
+        # Openings where both sides of the border are walkable, one or two entrances per opening
+        x0, y0, x1, y1 = self.bounds(cluster)
+        if other[0] > cluster[0]:
+            pairs = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+        else:
+            pairs = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+
+        entrances = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and self.is_walkable(*pair[0]) and self.is_walkable(*pair[1]):
+                run.append(pair)
+                continue
+            if len(run) > self.MAX_SINGLE_ENTRANCE:
+                entrances += [run[0], run[-1]]
+            elif run:
+                entrances.append(run[len(run) // 2])
+            run = []
+        return entrances
+
+    def refresh(self):
+        """Recalcule les entrées des clusters modifiés depuis la dernière recherche"""
+        if not self.dirty:
+            return
+        changed_borders = set()
+        for cx, cy in self.dirty:
+            for cluster, other in (((cx, cy), (cx + 1, cy)), ((cx, cy), (cx, cy + 1)),
+                                   ((cx - 1, cy), (cx, cy)), ((cx, cy - 1), (cx, cy))):
+                if 0 <= cluster[0] and 0 <= cluster[1] and other[0] < self.clusters_x and other[1] < self.clusters_y:
+                    changed_borders.add((cluster, other))
+        self.dirty = set()
+
+        for key in changed_borders:
+            cluster, other = key
+            entrances = self.compute_border(cluster, other)
+            old_entrances = self.borders.get(key, [])
+            if entrances == old_entrances:
+                continue
+            for tile, partner in old_entrances:
+                self.partners[tile].remove(partner)
+                self.partners[partner].remove(tile)
+            for tile, partner in entrances:
+                self.partners.setdefault(tile, []).append(partner)
+                self.partners.setdefault(partner, []).append(tile)
+            self.borders[key] = entrances
+            # Both clusters gained or lost entrances: their entrance distances are out of date
+            for side in (cluster, other):
+                self.intra.pop(side, None)
+
+        for tile in [tile for tile, partners in self.partners.items() if not partners]:
+            del self.partners[tile]
+        self.cluster_nodes = {cluster: set() for cluster in self.clusters()}
+        for tile in self.partners:
+            self.cluster_nodes[self.cluster_of(*tile)].add(tile)
+
+    def cluster_graph(self, cluster):
+        """Distances (et arbres de chemins) entre les entrées d'un cluster, calculées au premier passage"""
+        graph = self.intra.get(cluster)
+        if graph is None:
+            nodes = self.cluster_nodes[cluster]
+            graph = {node: self.local_costs(node, cluster, nodes) for node in nodes}
+            self.intra[cluster] = graph
+        return graph
+
+    def cluster_grid(self, cluster):
+        # Copy of the cluster's walkability with its own blocked border: searches never leave the cluster
+        grid = self.grids.get(cluster)
+        if grid is None:
+            x0, y0, x1, y1 = self.bounds(cluster)
+            width = x1 - x0 + 2
+            cells = bytearray(width * (y1 - y0 + 2))
+            walkable = self.map.walkable
+            stride = self.map.stride
+            for y in range(y0, y1):
+                row = (y - y0 + 1) * width + 1
+                start = (y + 1) * stride + x0 + 1
+                cells[row:row + x1 - x0] = walkable[start:start + x1 - x0]
+            steps = [(dy * width + dx, cost) for dx, dy, cost in Action.NEIGHBOR_STEPS]
+            grid = (cells, width, x0, y0, steps)
+            self.grids[cluster] = grid
+        return grid
+
+    def local_costs(self, source, cluster, targets):
+        """
+        Dijkstra limité au cluster, arrêté dès que toutes les cibles sont atteintes.
+
+        :return: (coût de chaque cible atteinte, arbre des prédécesseurs) : l'arbre donne le chemin
+                 vers chaque cible sans refaire de recherche
+        """
+        cells, width, x0, y0, steps = self.cluster_grid(cluster)
+        source_index = (source[1] - y0 + 1) * width + source[0] - x0 + 1
+        remaining = {(y - y0 + 1) * width + x - x0 + 1: (x, y) for x, y in targets if (x, y) != source}
+        distance = [float('inf')] * len(cells)
+        came_from = [-1] * len(cells)
+        distance[source_index] = 0
+        costs = {}
+        heap = [(0, source_index)]
+        while heap and remaining:
+            cost, current = heapq.heappop(heap)
+            if cost > distance[current]:
+                continue
+            if current in remaining:
+                costs[remaining.pop(current)] = cost
+            for offset, move_cost in steps:
+                neighbor = current + offset
+                if cells[neighbor]:
+                    new_cost = cost + move_cost
+                    if new_cost < distance[neighbor]:
+                        distance[neighbor] = new_cost
+                        came_from[neighbor] = current
+                        heapq.heappush(heap, (new_cost, neighbor))
+        return costs, (came_from, width, x0, y0, source_index)
+
+    @staticmethod
+    def tree_path(tree, target):
+        # Path from the root of a Dijkstra tree to target (root excluded)
+        came_from, width, x0, y0, source_index = tree
+        index = (target[1] - y0 + 1) * width + target[0] - x0 + 1
+        path = []
+        while index != source_index:
+            path.append((index % width - 1 + x0, index // width - 1 + y0))
+            index = came_from[index]
+        path.reverse()
+        return path
+
+    def local_path(self, start, goal, cluster):
+        """A* limité à un cluster, même format que Action.astar_pathfinding (départ exclu)"""
+        x0, y0, x1, y1 = self.bounds(cluster)
+        walkable = self.map.walkable
+        stride = self.map.stride
+        goal_x, goal_y = goal
+        open_list = [(0, start)]
+        came_from = {}
+        g_cost = {start: 0}
+        closed_set = set()
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if current == goal:
+                path = []
+                while current in came_from:
+                    path.append(current)
+                    current = came_from[current]
+                path.reverse()
+                return path
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+            x, y = current
+            for dx, dy, move_cost in Action.NEIGHBOR_STEPS:
+                nx, ny = x + dx, y + dy
+                if not (x0 <= nx < x1 and y0 <= ny < y1) or not walkable[(ny + 1) * stride + nx + 1]:
+                    continue
+                neighbor = (nx, ny)
+                tentative_g_cost = g_cost[current] + move_cost
+                if tentative_g_cost < g_cost.get(neighbor, float('inf')):
+                    g_cost[neighbor] = tentative_g_cost
+                    came_from[neighbor] = current
+                    heapq.heappush(open_list, (tentative_g_cost + abs(nx - goal_x) + abs(ny - goal_y), neighbor))
+        return None
+
+    def find_path(self, start, goal):
+        """
+        Cherche un chemin de start à goal sur le graphe des entrées puis l'affine cluster par cluster.
+
+        :return: Liste des cases à parcourir (départ exclu, arrivée incluse), ou None si la recherche
+                 hiérarchique échoue (l'appelant retombe alors sur le A* complet)
+        """
+        self.searches += 1
+        self.refresh()
+        start_cluster = self.cluster_of(*start)
+        goal_cluster = self.cluster_of(*goal)
+
+        if start_cluster == goal_cluster:
+            path = self.local_path(start, goal, start_cluster)
+            if path is not None:
+                return path
+
+        # Temporary links from the start and to the goal through the entrances of their clusters
+        start_links, start_tree = self.local_costs(start, start_cluster, self.cluster_nodes[start_cluster])
+        goal_links, goal_tree = self.local_costs(goal, goal_cluster, self.cluster_nodes[goal_cluster])
+        goal_x, goal_y = goal
+
+        # A* on the abstract graph (same Manhattan heuristic as the grid A*)
+        g_cost = {start: 0}
+        came_from = {}
+        open_list = [(0, start)]
+        closed_set = set()
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if current == goal:
+                break
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+
+            if current == start:
+                edges = list(start_links.items())
+            else:
+                edges = list(self.cluster_graph(self.cluster_of(*current))[current][0].items())
+                if current in goal_links:
+                    edges.append((goal, goal_links[current]))
+            edges += [(partner, 1) for partner in self.partners.get(current, ())]  # Straight step across the border
+            for neighbor, cost in edges:
+                tentative_g_cost = g_cost[current] + cost
+                if tentative_g_cost < g_cost.get(neighbor, float('inf')):
+                    g_cost[neighbor] = tentative_g_cost
+                    came_from[neighbor] = current
+                    priority = tentative_g_cost + abs(neighbor[0] - goal_x) + abs(neighbor[1] - goal_y)
+                    heapq.heappush(open_list, (priority, neighbor))
+        else:
+            return None
+
+        abstract_path = [goal]
+        while abstract_path[-1] in came_from:
+            abstract_path.append(came_from[abstract_path[-1]])
+        abstract_path.reverse()
+
+        # Refine every abstract edge from the Dijkstra trees: a step across a border, or a path inside a cluster
+        path = []
+        for a, b in zip(abstract_path, abstract_path[1:]):
+            if self.cluster_of(*a) != self.cluster_of(*b):
+                path.append(b)
+            elif a == start:
+                path += self.tree_path(start_tree, b)
+            elif b == goal:
+                path += reversed(self.tree_path(goal_tree, a)[:-1])
+                path.append(goal)
+            else:
+                path += self.tree_path(self.cluster_graph(self.cluster_of(*a))[a][1], b)
+        return path
+
+    def stats(self):
+        return {'searches': self.searches, 'fallbacks': self.fallbacks, 'entrances': len(self.partners)}
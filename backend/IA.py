@@ -2,6 +2,8 @@
 import random
 import math
 
+import numpy as np
+
 from Actions import *
 from logger import debug_print
 from Building import *
@@ -18,6 +20,8 @@ class IA:
         self.current_time_called = current_time_called
         self.priorities = self.set_priorities()
         self.decided_builds = [] # Store the decided building positions to avoid overlap --> stored for whole game
+        self.reserved_tables = None  # (decided, in progress) SummedAreaTables, see reserved_areas
+        self.reserved_key = None  # State of decided_builds / constructing_buildings the tables were built from
         self.target_player = None  # Targeted player for attacks
         self.defending_units = []  # List to track defending units
         self.min_villagers = 2  # Minimum villagers to keep
@@ -120,26 +124,27 @@ class IA:
             building_villagers.extend(gathering_villagers)
             gathering_villagers = []
 
-        self.build_structures(list(set(building_villagers)))
+        self.build_structures(list(dict.fromkeys(building_villagers)))
         
         _, remaining_builders, _ = self.get_inactive_units()
         remaining_builders = [v for v in remaining_builders if v not in building_villagers]
         gathering_villagers.extend(remaining_builders)
         
-        gathering_villagers = list(set(gathering_villagers))
+        gathering_villagers = list(dict.fromkeys(gathering_villagers))
         self.gather_resources(gathering_villagers)
         
-        # Check for nearby enemies for all units
-        for unit in (u for u in self.player.units if u.task != "encircling"):
-            nearby_enemies = self.find_nearby_enemies(5, unit.position)  # 5 tile radius
-            if nearby_enemies:
-                closest_enemy = min(nearby_enemies, 
-                    key=lambda e: self.calculate_distance(unit.position, e.position))
+        # Check for nearby enemies for all units, in a single query
+        units = [u for u in self.player.units if u.task != "encircling"]
+        closest_enemies = self.find_nearest_enemies([unit.position for unit in units], 5)  # 5 tile radius
+        for unit, closest_enemy in zip(units, closest_enemies):
+            if closest_enemy is not None and closest_enemy.hp <= 0:
+                closest_enemy = self.find_nearest_enemies([unit.position], 5)[0]  # Killed earlier in this loop
+            if closest_enemy is not None:
                 Action(self.game_map).go_battle(unit, closest_enemy, self.current_time_called)
         
         # Handle remaining military strategy
         if inactive_troops:
-            self.attack(list(set(inactive_troops)))
+            self.attack(list(dict.fromkeys(inactive_troops)))
 
 
 #### TRAINING STRATEGY ####
@@ -255,33 +260,88 @@ class IA:
             else:
                 Action(self.game_map).gather_resources(villager, "Wood", self.current_time_called)
 
+    def reserved_areas(self):
+        """
+        Tables de sommes des emplacements réservés : le carré de côté 2 * taille + 1 autour de chaque
+        bâtiment décidé, et la position de chaque construction en cours. Une position est trop proche
+        d'une réservation si le carré de côté 2 * taille - 1 qui l'entoure en contient une case.
+        decided_builds ne fait que grandir : les tables ne sont recalculées que quand une liste a changé.
+
+        :return: (SummedAreaTable des bâtiments décidés, SummedAreaTable des constructions en cours)
+        """
+        constructing = self.player.constructing_buildings
+        key = getattr(self, 'reserved_key', None)  # Missing from saves made before the tables
+        if key is None or key[0] != len(self.decided_builds) or key[1] is not constructing or key[2] != len(constructing):
+            shape = (self.game_map.height, self.game_map.width)
+            decided = np.zeros(shape, dtype=np.int32)
+            for build_x, build_y, build_size in self.decided_builds:
+                decided[max(build_y - build_size, 0):build_y + build_size + 1, max(build_x - build_size, 0):build_x + build_size + 1] += 1
+            in_progress = np.zeros(shape, dtype=np.int32)
+            for building_info in constructing:
+                construct_x, construct_y = building_info.get("position")
+                in_progress[construct_y, construct_x] += 1
+            self.reserved_tables = (SummedAreaTable(decided), SummedAreaTable(in_progress))
+            self.reserved_key = (len(self.decided_builds), constructing, len(constructing))
+        return self.reserved_tables
+
     def is_position_valid(self, x, y, building_size, is_building=True):
         # Check map boundaries
         if not (0 <= x < self.game_map.width - building_size and 
                 0 <= y < self.game_map.height - building_size):
             return False
-        if is_building:
-            for build in self.decided_builds:
-                if (abs(build[0] - x) < building_size + build[2] and
-                    abs(build[1] - y) < building_size + build[2]):
-                    return False
+        decided, in_progress = self.reserved_areas()
+        # Reservations less than building_size away on both axes
+        x0, y0 = max(x - building_size + 1, 0), max(y - building_size + 1, 0)
+        x1, y1 = min(x + building_size, self.game_map.width), min(y + building_size, self.game_map.height)
+        if is_building and decided.area(x0, y0, x1, y1):
+            return False
 
         # Check if area is free on map
         if not self.game_map.is_area_free(x, y, building_size):
             return False
             
         # Check for overlap with buildings under construction
-        for building_info in self.player.constructing_buildings:
-            # Get position from the dictionary format
-            construct_x = building_info.get("position")[0]
-            construct_y = building_info.get("position")[1]
-            construct_size = building_info.get("size", building_size)  # Default to same size if not specified
-            
-            if (abs(construct_x - x) < max(building_size, construct_size) and
-                abs(construct_y - y) < max(building_size, construct_size)):
-                return False
+        if in_progress.area(x0, y0, x1, y1):
+            return False
         return True
 
+    def find_build_position(self, x, y, building_size):
+        """
+        Position de construction autour de (x, y) : dans le plus petit carré de rayon 5 à 14 qui contient
+        une position valide (is_position_valid), la première par dx puis dy croissants. Toute la fenêtre
+        est testée d'un coup sur les tables de sommes.
+
+        :return: (x, y), ou None si aucune position du carré de rayon 14 n'est valide
+        """
+        width, height = self.game_map.width, self.game_map.height
+        offsets = np.arange(-14, 15)
+        xs = x + offsets[:, None]  # [dx, dy] grids, so that the flat order is the order of the ring search
+        ys = y + offsets[None, :]
+        valid = (xs >= 0) & (xs < width - building_size) & (ys >= 0) & (ys < height - building_size)
+        if not valid.any():
+            return None
+        # Positions off the map are clamped for the lookups, and already ruled out by valid
+        xs = np.clip(xs, 0, width - building_size)
+        ys = np.clip(ys, 0, height - building_size)
+
+        decided, in_progress = self.reserved_areas()
+        x0, y0 = np.maximum(xs - building_size + 1, 0), np.maximum(ys - building_size + 1, 0)
+        x1, y1 = np.minimum(xs + building_size, width), np.minimum(ys + building_size, height)
+        valid &= decided.area(x0, y0, x1, y1) == 0
+        valid &= in_progress.area(x0, y0, x1, y1) == 0
+        valid &= self.game_map.blocked_areas().area(xs, ys, xs + building_size, ys + building_size) == 0
+        # Units move every tick: their table only covers the window
+        left, top = max(x - 14, 0), max(y - 14, 0)
+        units = SummedAreaTable(self.game_map.unit_count[top:y + 14 + building_size, left:x + 14 + building_size] > 0)
+        valid &= units.area(xs - left, ys - top, xs - left + building_size, ys - top + building_size) == 0
+        if not valid.any():
+            return None
+
+        ring = np.maximum(np.abs(offsets)[:, None], np.abs(offsets)[None, :])
+        radius = max(5, ring[valid].min())
+        best = np.argmax(valid & (ring <= radius))
+        return (x + int(offsets[best // len(offsets)]), y + int(offsets[best % len(offsets)]))
+
 
 #### BUILDING STRATEGY ####
 
@@ -289,7 +349,7 @@ class IA:
         if not villagers:
             return
             
-        villagers = list(set(villagers))  # Ensure no duplicates
+        villagers = list(dict.fromkeys(villagers))  # Ensure no duplicates (keeping order so seeded games are reproducible)
         
         # Check if we should join existing construction (1/3 chance)
         if self.player.constructing_buildings and random.random() < 0.33:
@@ -350,7 +410,7 @@ class IA:
               and self.player.owned_resources["Wood"] >= 25):
             least_constructed_building = "House"
             self.debug_print("Strategy : Population limit reached, building a House", 'Blue')
-        elif GameMode == "Gold Rush":
+        elif getattr(self.game_map, 'game_mode', GameMode) == "Gold Rush":
             if self.player.owned_resources["Wood"] >= 100 and not self.secure_gold[2]:
                 least_constructed_building = "Camp"
                 self.secure_gold[2] = 1
@@ -415,18 +475,8 @@ class IA:
                 x, y = existing_building.position
             else:
                 x, y = existing_building
-            for radius in range(5, 15): # buildings not too close to each other nor too far
-                for dx in range(-radius, radius + 1):
-                    for dy in range(-radius, radius + 1):
-                        new_x = x + dx
-                        new_y = y + dy
-                        if self.is_position_valid(new_x, new_y, building_class(self.player).size + 1, is_building=True):
-                            build_position = (new_x, new_y)
-                            break
-                    if build_position:
-                        break
-                if build_position:
-                    break
+            # buildings not too close to each other nor too far
+            build_position = self.find_build_position(x, y, building_class(self.player).size + 1)
             if build_position:
                 break
         if build_position:
@@ -548,19 +598,20 @@ class IA:
         return ((pos1[0] - pos2[0]) ** 2 + (pos1[1] - pos2[1]) ** 2) ** 0.5
     
     def find_nearby_enemies(self, max_distance, unit_position):
-        enemies = []
-        for player in self.players:
-            if player != self.player:
-                for enemy in player.units:
-                    dist = self.calculate_distance(unit_position, enemy.position)
-                    if dist <= max_distance:
-                        enemies.append(enemy)
-                for building in player.buildings:
-                    dist = self.calculate_distance(unit_position, building.position)
-                    if dist <= max_distance:
-                        enemies.append(building)
-        return enemies
+        # Only the cells of the map's spatial hash covering the radius are looked at, nearest enemies first
+        return [
+            entity for entity in self.game_map.spatial_hash.query(unit_position, max_distance)
+            if entity.player != self.player
+        ]
     
+    def find_nearest_enemies(self, positions, max_distance):
+        """
+        Plus proche ennemi (unité ou bâtiment) de chaque position, en une seule requête sur le spatial hash.
+
+        :return: Liste alignée sur positions, None là où aucun ennemi n'est à moins de max_distance
+        """
+        return self.game_map.spatial_hash.nearest(positions, max_distance, lambda entity: entity.player != self.player)
+
     def find_ennemy_base(self):
         return self.target_player.buildings[0].position
 
@@ -585,9 +636,8 @@ class IA:
     def defend(self, unit):
                     
         # Find closest enemy units or buildings
-        enemies = self.find_nearby_enemies(max_distance=15, unit_position=unit.position)
-        if enemies:
-            closest_enemy = min(enemies, key=lambda e: self.calculate_distance(unit.position, e.position))
+        closest_enemy = self.find_nearest_enemies([unit.position], 15)[0]
+        if closest_enemy is not None:
             Action(self.game_map).go_battle(unit, closest_enemy, self.current_time_called)
 
     def get_base_position(self):
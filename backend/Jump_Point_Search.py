@@ -0,0 +1,156 @@
+#Jump_Point_Search.py
+
+import heapq
+
+
+# Jump Point Search Class
+class JumpPointSearch:
+    """
+    Variante Jump Point Search du A* de Action : sur terrain dégagé, les lignes droites et les
+    diagonales sont parcourues par des sauts au lieu d'empiler chaque case symétrique.
+    Mêmes coûts (1 / 1.414), même règle de praticabilité (la grille de Map.walkable, les
+    diagonales pouvant longer un obstacle) et même format de chemin que astar_pathfinding.
+    """
+    DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+    def __init__(self, game_map):
+        self.map = game_map
+        self.expansions = 0  # Nodes popped from the open list, for the benchmarks
+        self.fallbacks = 0
+
+    def tile_changed(self, x, y, walkable):
+        pass  # Reads the walkability bitmap directly: nothing to update
+
+    def reset(self):
+        pass
+
+    def walkable(self, x, y):
+        return self.map.walkable[(y + 1) * self.map.stride + x + 1]
+
+    def successor_directions(self, x, y, dx, dy):
+        # Natural and forced neighbours of a node reached by moving (dx, dy)
+        walkable = self.walkable
+        if dx == 0 and dy == 0:
+            return self.DIRECTIONS
+        if dx and dy:
+            directions = [(dx, 0), (0, dy), (dx, dy)]
+            if not walkable(x - dx, y):
+                directions.append((-dx, dy))
+            if not walkable(x, y - dy):
+                directions.append((dx, -dy))
+            return directions
+        if dx:
+            directions = [(dx, 0)]
+            if not walkable(x, y + 1):
+                directions.append((dx, 1))
+            if not walkable(x, y - 1):
+                directions.append((dx, -1))
+            return directions
+        directions = [(0, dy)]
+        if not walkable(x + 1, y):
+            directions.append((1, dy))
+        if not walkable(x - 1, y):
+            directions.append((-1, dy))
+        return directions
+
+    def jump_straight(self, x, y, dx, dy, goal):
+        walkable = self.map.walkable
+        stride = self.map.stride
+        step = dy * stride + dx
+        index = (y + 1) * stride + x + 1
+        # Tiles on each side of the line, relative to the current tile
+        side_a = 1 if dx == 0 else stride
+        side_b = -side_a
+        while True:
+            x += dx
+            y += dy
+            index += step
+            if not walkable[index]:
+                return None
+            if (x, y) == goal:
+                return (x, y)
+            if (not walkable[index + side_a] and walkable[index + side_a + step]) or \
+               (not walkable[index + side_b] and walkable[index + side_b + step]):
+                return (x, y)
+
+    def jump_diagonal(self, x, y, dx, dy, goal):
+        walkable = self.map.walkable
+        stride = self.map.stride
+        while True:
+            x += dx
+            y += dy
+            index = (y + 1) * stride + x + 1
+            if not walkable[index]:
+                return None
+            if (x, y) == goal:
+                return (x, y)
+            # Forced neighbours behind the diagonal
+            if (not walkable[index - dx] and walkable[index - dx + dy * stride]) or \
+               (not walkable[index - dy * stride] and walkable[index + dx - dy * stride]):
+                return (x, y)
+            # A jump point on the straight lines makes this tile a jump point too
+            if self.jump_straight(x, y, dx, 0, goal) or self.jump_straight(x, y, 0, dy, goal):
+                return (x, y)
+
+    def find_path(self, start, goal):
+        """
+        :return: Liste des cases de start (exclu) à goal (inclus), ou None si aucun chemin n'existe
+        """
+        goal_x, goal_y = goal
+        open_list = [(0, start)]
+        came_from = {}
+        g_cost = {start: 0}
+        closed_set = set()
+
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if current == goal:
+                return self.expand(came_from, current)
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+            self.expansions += 1
+
+            x, y = current
+            parent = came_from.get(current)
+            if parent is None:
+                dx = dy = 0
+            else:
+                dx = (x > parent[0]) - (x < parent[0])
+                dy = (y > parent[1]) - (y < parent[1])
+
+            for ndx, ndy in self.successor_directions(x, y, dx, dy):
+                if ndx and ndy:
+                    jump_point = self.jump_diagonal(x, y, ndx, ndy, goal)
+                else:
+                    jump_point = self.jump_straight(x, y, ndx, ndy, goal)
+                if jump_point is None or jump_point in closed_set:
+                    continue
+                distance = max(abs(jump_point[0] - x), abs(jump_point[1] - y))
+                tentative_g_cost = g_cost[current] + distance * (1.414 if ndx and ndy else 1)
+                if tentative_g_cost < g_cost.get(jump_point, float('inf')):
+                    g_cost[jump_point] = tentative_g_cost
+                    came_from[jump_point] = current
+                    priority = tentative_g_cost + abs(jump_point[0] - goal_x) + abs(jump_point[1] - goal_y)
+                    heapq.heappush(open_list, (priority, jump_point))
+        return None
+
+    @staticmethod
+    def expand(came_from, current):
+        # Jump points are joined by straight or diagonal lines: list every tile in between
+        path = []
+        while current in came_from:
+            parent = came_from[current]
+            dx = (current[0] > parent[0]) - (current[0] < parent[0])
+            dy = (current[1] > parent[1]) - (current[1] < parent[1])
+            x, y = current
+            while (x, y) != parent:
+                path.append((x, y))
+                x -= dx
+                y -= dy
+            current = parent
+        path.reverse()
+        return path
+
+    def stats(self):
+        return {'expansions': self.expansions, 'fallbacks': self.fallbacks}
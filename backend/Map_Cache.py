@@ -0,0 +1,158 @@
+#Map_Cache.py
+
+import os
+import sys
+import time
+import zipfile
+import argparse
+
+import numpy as np
+
+import config
+
+# Ajouter le chemin du projet à sys.path pour ne pas avoir à le faire dans le terminal
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+
+# Map Cache Class
+class MapCache:
+    """
+    Cache disque des cartes générées, une archive .npz compressée par (taille, GameMode, graine)
+    pour les couches de ressources, et une par (carte, combinaison de civilisations déjà jouée)
+    pour la position des bâtiments de départ. Chaque archive n'est écrite qu'entière : des parties
+    parallèles sur la même carte avec d'autres civilisations n'écrasent jamais leurs bâtiments.
+    """
+    VERSION = 1  # Increase when the generator changes: older files are then ignored
+
+    def __init__(self, directory=None):
+        self.directory = directory or config.map_cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, width, height, game_mode, seed, suffix=""):
+        mode = str(game_mode).lower().replace(" ", "_")
+        return os.path.join(self.directory, f"map_{width}x{height}_{mode}_{seed}{suffix}.npz")
+
+    def buildings_path(self, game_map, civilizations):
+        return self.path(game_map.width, game_map.height, game_map.game_mode, game_map.seed, "_" + self.buildings_key(civilizations))
+
+    def read(self, path):
+        try:
+            with np.load(path) as archive:
+                entries = {name: archive[name] for name in archive.files}
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+        if int(entries.get('version', -1)) != self.VERSION:
+            return None
+        return entries
+
+    def write(self, path, entries):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write next to the file then rename, so parallel games never read a half written archive
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            np.savez_compressed(file, version=self.VERSION, **entries)
+        os.replace(temp_path, path)
+
+    def load_layers(self, width, height, game_mode, seed):
+        """Retourne (resource_type, resource_variant) pour cette carte, ou None si elle n'est pas en cache"""
+        entries = self.read(self.path(width, height, game_mode, seed))
+        if entries is None or 'resource_type' not in entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entries['resource_type'], entries['resource_variant']
+
+    def store_layers(self, width, height, game_mode, seed, resource_type, resource_variant):
+        self.write(self.path(width, height, game_mode, seed), {
+            'resource_type': resource_type.astype(np.int8),
+            'resource_variant': resource_variant.astype(np.int8),
+        })
+
+    @staticmethod
+    def buildings_key(civilizations):
+        return "buildings-" + "-".join(civilizations)
+
+    def load_buildings(self, game_map, civilizations):
+        """
+        Retourne la liste des bâtiments de départ [(indice du joueur, classe, x, y), ...] déjà calculée
+        pour cette carte et ces civilisations, ou None.
+        """
+        entries = self.read(self.buildings_path(game_map, civilizations))
+        if entries is None:
+            return None
+        return [
+            (int(player_index), str(building_name), int(x), int(y))
+            for player_index, building_name, x, y in zip(entries["player"], entries["name"], entries["x"], entries["y"])
+        ]
+
+    def store_buildings(self, game_map, civilizations, layout):
+        if not os.path.exists(self.path(game_map.width, game_map.height, game_map.game_mode, game_map.seed)):
+            return  # Only maps already in the cache get their starting buildings stored
+        self.write(self.buildings_path(game_map, civilizations), {
+            'player': np.array([entry[0] for entry in layout], dtype=np.int8),
+            'name': np.array([entry[1] for entry in layout], dtype=str),
+            'x': np.array([entry[2] for entry in layout], dtype=np.int32),
+            'y': np.array([entry[3] for entry in layout], dtype=np.int32),
+        })
+
+
+def prewarm(cache, sizes, modes, seeds, civilizations=None):
+    """
+    Génère et met en cache toutes les cartes demandées.
+
+    :param civilizations: Si fourni, place aussi les bâtiments de départ de ces civilisations
+    """
+    from frontend.Terrain import Map
+
+    for width, height in sizes:
+        for mode in modes:
+            for seed in seeds:
+                start = time.perf_counter()
+                if civilizations:
+                    from backend.Starter_File import create_players
+                    from Game_Engine import GameEngine
+                    players = create_players(civilizations, ["aggressive"])
+                    GameEngine(game_mode=mode, map_size=(width, height), players=players, seed=seed, map_cache=cache)
+                else:
+                    Map(width, height, game_mode=mode, seed=seed, cache=cache)
+                print(f"{width}x{height} {mode} seed {seed}: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate maps into the on-disk map cache.")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["120x120"],
+        metavar="WIDTHxHEIGHT",
+        help="Map sizes to generate (default=120x120)."
+    )
+    parser.add_argument(
+        "--mode",
+        nargs="+",
+        choices=["Utopia", "Gold Rush"],
+        default=["Utopia", "Gold Rush"],
+        help="Game modes to generate (default=Utopia \"Gold Rush\")."
+    )
+    parser.add_argument("--seeds", type=int, default=8, help="Number of seeds per size and mode (default=8).")
+    parser.add_argument("--seed", type=int, default=0, help="First seed; seeds are seed .. seed + seeds - 1 (default=0).")
+    parser.add_argument(
+        "--civilizations",
+        nargs="+",
+        choices=["Means", "Leans", "Marines"],
+        default=None,
+        help="Also cache the starting buildings of these civilizations, one per player."
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=config.map_cache_dir,
+        help=f"Cache directory (default={config.map_cache_dir})."
+    )
+    args = parser.parse_args()
+
+    sizes = [tuple(int(value) for value in size.lower().split("x")) for size in args.sizes]
+    seeds = range(args.seed, args.seed + args.seeds)
+    prewarm(MapCache(args.cache_dir), sizes, args.mode, seeds, args.civilizations)
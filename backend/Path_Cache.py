@@ -0,0 +1,82 @@
+#Path_Cache.py
+
+from collections import OrderedDict
+
+
+# Path Cache Class
+class PathCache:
+    """
+    Chemins A* déjà calculés, indexés par (départ, arrivée) et bornés en LRU.
+    Les villageois refont sans cesse les mêmes trajets ressource <-> point de dépôt :
+    seul le premier trajet coûte un A*. La carte prévient le cache à chaque case dont
+    la praticabilité change, et seuls les chemins concernés sont oubliés.
+    """
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (start, goal) -> path, least recently used first
+        self.tile_keys = {}  # tile -> keys of the cached paths going through it
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, start, goal):
+        key = (start, goal)
+        path = self.entries.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return list(path)  # Units pop the steps of their path: never hand out the cached one
+
+    def put(self, start, goal, path):
+        key = (start, goal)
+        if key in self.entries:
+            self.discard(key)
+        self.entries[key] = tuple(path)
+        for tile in path:
+            self.tile_keys.setdefault(tile, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self.discard(next(iter(self.entries)))
+
+    def discard(self, key):
+        path = self.entries.pop(key, None)
+        if path is None:
+            return
+        for tile in path:
+            keys = self.tile_keys.get(tile)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tile_keys[tile]
+
+    def tile_changed(self, x, y, walkable):
+        """
+        Oublie les chemins rendus invalides (case bloquée sur le chemin) ou probablement
+        trop longs (case libérée juste à côté du chemin, qui le contournait).
+        """
+        if walkable:
+            tiles = [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        else:
+            tiles = [(x, y)]
+        for tile in tiles:
+            for key in list(self.tile_keys.get(tile, ())):
+                self.discard(key)
+                self.invalidations += 1
+
+    def reset(self):
+        self.entries.clear()
+        self.tile_keys.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'entries': len(self.entries),
+        }
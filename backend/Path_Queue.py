@@ -0,0 +1,219 @@
+#Path_Queue.py
+
+import heapq
+
+from Actions import Action
+
+
+# Path Search Class
+class PathSearch:
+    """
+    A* de Action._astar_search (mêmes coûts, même heuristique, même ordre d'exploration) découpé
+    en tranches : step() reprend la recherche là où la tranche précédente s'est arrêtée.
+    """
+    def __init__(self, game_map, start, goal, turn):
+        self.map = game_map
+        self.start = start
+        self.goal = goal
+        self.turn = turn  # Tick the search was queued at
+        self.open_list = [(0, start)]
+        self.came_from = {}
+        self.g_cost = {start: 0}
+        self.closed_set = set()
+        self.done = False
+        self.path = None
+
+    def step(self, max_expansions):
+        """
+        Développe au plus max_expansions cases.
+
+        :return: Nombre de cases développées
+        """
+        open_list = self.open_list
+        came_from = self.came_from
+        g_cost = self.g_cost
+        closed_set = self.closed_set
+        walkable = self.map.walkable
+        stride = self.map.stride
+        goal = self.goal
+        goal_x, goal_y = goal
+        expansions = 0
+        while open_list and expansions < max_expansions:
+            _, current = heapq.heappop(open_list)
+            if current == goal:
+                path = []
+                while current in came_from:
+                    path.append(current)
+                    current = came_from[current]
+                path.reverse()
+                self.path = path
+                self.done = True
+                return expansions
+            closed_set.add(current)
+            expansions += 1
+            x, y = current
+            current_g_cost = g_cost[current]
+            for dx, dy, move_cost in Action.NEIGHBOR_STEPS:
+                nx, ny = x + dx, y + dy
+                if not walkable[(ny + 1) * stride + nx + 1]:
+                    continue
+                neighbor = (nx, ny)
+                if neighbor in closed_set:
+                    continue
+                tentative_g_cost = current_g_cost + move_cost
+                if neighbor not in g_cost or tentative_g_cost < g_cost[neighbor]:
+                    g_cost[neighbor] = tentative_g_cost
+                    heapq.heappush(open_list, (tentative_g_cost + abs(nx - goal_x) + abs(ny - goal_y), neighbor))
+                    came_from[neighbor] = current
+        if not open_list:
+            self.done = True  # No path
+        return expansions
+
+
+# Path Queue Class
+class PathQueue:
+    """
+    File des recherches de chemin, avancées à chaque tick dans la limite d'un budget global de
+    cases développées (config.path_node_budget). Une recherche trop longue s'étale sur plusieurs
+    ticks au lieu de bloquer la boucle de jeu : l'unité reste en attente (en planification)
+    jusqu'à ce que son chemin soit prêt. Les unités demandant le même trajet partagent la recherche.
+
+    Une case qui change pendant la recherche n'est pas prise en compte : move_unit répare le
+    chemin si un pas se retrouve bloqué.
+
+    Le budget est celui de toutes les recherches sur la grille du tick. Celles qui ne passent pas
+    par la file le consomment aussi (allowance, spend) : le Dijkstra des champs de flux (FlowField),
+    les détours autour des réservations (ReservationTable.detour) et les réparations D* Lite des
+    chemins coupés (PathRepairs). Une unité dont le champ n'a plus de budget attend le tick suivant
+    (defer), comme une recherche en file ; sans budget, une unité qui croise une réservation garde
+    son chemin sans détour, et une réparation laisse place à une recherche en file.
+    Restent hors budget les raccords de quelques cases entre la sortie d'un champ et la case de
+    l'unité autour d'un bâtiment.
+    """
+    def __init__(self, game_map, node_budget=2000):
+        self.map = game_map
+        self.node_budget = node_budget
+        self.searches = {}  # (start, goal) -> PathSearch, in request order
+        self.waiting = {}  # unit -> (start, goal) it waits for
+        self.done = {}  # (start, goal) -> (path, units that have not collected it yet)
+        self.deferred = set()  # Units whose search outside the queue ran out of budget this tick
+        self.budget = node_budget  # Expansions left in the current tick
+        self.turn = 0
+        self.queued = 0  # Searches that could not end in the tick they were requested in
+        self.completed = 0
+        self.waited = 0  # Queued searches completed
+        self.total_ticks = 0  # Sum of their ticks-to-path
+        self.expansions = 0
+        self.deferrals = 0
+
+    def __contains__(self, unit):
+        return unit in self.waiting or unit in self.deferred
+
+    def allowance(self):
+        """Cases que les recherches faites hors de la file peuvent encore développer pendant ce tick"""
+        if not self.node_budget:
+            return float('inf')  # Worker pool with no budget in the game loop
+        return max(self.budget, 0)
+
+    def defer(self, unit):
+        """unit attend le tick suivant : sa recherche hors de la file a épuisé le budget de ce tick"""
+        self.deferred.add(unit)
+        self.deferrals += 1
+
+    def request(self, unit, start, goal):
+        """
+        :return: (True, chemin) si la recherche de ce trajet est terminée (chemin None s'il n'existe pas),
+                 (False, None) si l'unité doit encore attendre
+        """
+        key = (start, goal)
+        waited = self.waiting.get(unit)
+        if waited is not None and waited != key:
+            if waited[0] == start:
+                # New goal (a moving target) from the same tile: like a unit already on its way, keep
+                # the trip being searched rather than throwing the work away
+                key = waited
+            else:
+                self.release(unit)
+
+        finished = self.done.get(key)
+        if finished is not None and unit in finished[1]:
+            path, units = finished
+            units.discard(unit)
+            if not units:
+                del self.done[key]
+            del self.waiting[unit]
+            return True, list(path) if path is not None else None
+
+        if key in self.searches:
+            self.waiting[unit] = key
+            return False, None
+
+        # A new search starts at once on what is left of the tick's budget: most of them end right away
+        search = PathSearch(self.map, start, goal, self.turn)
+        self.spend(search.step(self.budget))
+        if search.done:
+            self.finish(search, set())
+            return True, search.path
+        self.waiting[unit] = key
+        self.queue(key, search)
+        return False, None
+
+    def queue(self, key, search):
+        # Resumed by run() at the next ticks
+        self.searches[key] = search
+        self.queued += 1
+
+    def release(self, unit):
+        self.deferred.discard(unit)
+        key = self.waiting.pop(unit, None)
+        if key is None:
+            return
+        finished = self.done.get(key)
+        if finished is not None:
+            finished[1].discard(unit)
+            if not finished[1]:
+                del self.done[key]
+        elif not any(other == key for other in self.waiting.values()):
+            self.searches.pop(key, None)  # Nobody waits for it anymore
+
+    def new_tick(self):
+        self.turn += 1
+        self.budget = self.node_budget
+        self.deferred.clear()
+
+    def run(self):
+        """Nouveau tick : rétablit le budget et le dépense d'abord sur les recherches en attente, dans l'ordre des demandes"""
+        self.new_tick()
+        while self.searches and self.budget > 0:
+            key = next(iter(self.searches))
+            search = self.searches[key]
+            self.spend(search.step(self.budget))
+            if not search.done:
+                break
+            del self.searches[key]
+            self.finish(search, {unit for unit, waited in self.waiting.items() if waited == key})
+
+    def spend(self, expansions):
+        self.budget -= expansions
+        self.expansions += expansions
+
+    def finish(self, search, units):
+        self.completed += 1
+        if self.turn > search.turn:
+            self.waited += 1
+            self.total_ticks += self.turn - search.turn
+        path_cache = self.map.path_cache
+        if path_cache is not None and search.path:
+            path_cache.put(search.start, search.goal, search.path)
+        if units:
+            self.done[(search.start, search.goal)] = (search.path, units)
+
+    def stats(self):
+        return {
+            'queued': self.queued,
+            'completed': self.completed,  # Immediate and queued searches
+            'pending': len(self.searches),
+            'average_ticks': self.total_ticks / self.waited if self.waited else 0.0,  # Of the queued searches
+            'expansions': self.expansions,  # Of every search charged to the budget
+            'deferrals': self.deferrals,
+        }
@@ -0,0 +1,162 @@
+#Path_Workers.py
+
+import atexit
+import queue
+import struct
+import multiprocessing
+from multiprocessing import shared_memory
+
+from Path_Queue import PathQueue, PathSearch
+
+HEADER = struct.calcsize("q")  # Snapshot generation, stored before the walkability bytes
+
+
+def read_generation(buffer):
+    return struct.unpack_from("q", buffer, 0)[0]
+
+
+# Snapshot Class
+class Snapshot:
+    """Copie locale de la praticabilité publiée en mémoire partagée, utilisable par PathSearch"""
+    def __init__(self, memory, stride, size):
+        self.stride = stride
+        self.size = size
+        self.memory = memory
+        self.generation = -1
+        self.walkable = bytearray(size)
+
+    def refresh(self):
+        """Recopie la dernière version publiée (quelques Ko) si elle a changé"""
+        buffer = self.memory.buf
+        while True:
+            generation = read_generation(buffer)
+            if generation == self.generation:
+                return
+            if generation % 2 == 0:
+                self.walkable[:] = buffer[HEADER:HEADER + self.size]
+                # Odd, or changed during the copy: the main process was rewriting it, copy again
+                if read_generation(buffer) == generation:
+                    self.generation = generation
+                    return
+
+
+def worker_main(memory_name, stride, size, requests, results):
+    """Boucle d'un processus de recherche : A* complet sur le dernier instantané publié"""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    snapshot = Snapshot(memory, stride, size)
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            start, goal = request
+            snapshot.refresh()
+            search = PathSearch(snapshot, start, goal, 0)
+            search.step(float('inf'))
+            results.put(((start, goal), snapshot.generation, search.path))
+    finally:
+        del snapshot
+        memory.close()
+
+
+# Path Worker Pool Class
+class PathWorkerPool(PathQueue):
+    """
+    Variante de PathQueue dont les recherches trop longues pour le budget du tick partent dans des
+    processus de recherche au lieu d'être reprises dans la boucle de jeu. Les processus lisent un
+    instantané de Map.walkable en mémoire partagée, republié à chaque tick où une case a changé ;
+    les résultats reviennent par une file que run() vide à chaque tick, et move_unit les récupère
+    comme ceux de PathQueue.
+
+    Chaque processus recopie l'instantané au début d'une recherche. Un résultat calculé sur un
+    instantané plus ancien que le dernier publié n'est gardé que si son chemin est encore
+    praticable ; sinon la demande est renvoyée aux processus.
+    """
+    def __init__(self, game_map, workers=2, node_budget=2000):
+        super().__init__(game_map, node_budget)
+        self.memory = shared_memory.SharedMemory(create=True, size=HEADER + len(game_map.walkable))
+        self.generation = 0
+        self.dirty = True
+        self.publish()
+        context = multiprocessing.get_context("spawn")  # No fork of a process that may run GUI threads
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(target=worker_main, args=(self.memory.name, game_map.stride, len(game_map.walkable), self.requests, self.results), daemon=True)
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+        self.reissued = 0
+        self.closed = False
+        atexit.register(self.close)
+
+    def tile_changed(self, x, y, walkable):
+        self.dirty = True  # Published once at the next tick, whatever the number of changes
+
+    def reset(self):
+        self.dirty = True
+
+    def publish(self):
+        if not self.dirty:
+            return
+        # Odd generation while the bytes are rewritten: a worker copying them then knows it must copy again
+        buffer = self.memory.buf
+        struct.pack_into("q", buffer, 0, self.generation + 1)
+        buffer[HEADER:HEADER + len(self.map.walkable)] = self.map.walkable
+        self.generation += 2
+        struct.pack_into("q", buffer, 0, self.generation)
+        self.dirty = False
+
+    def queue(self, key, search):
+        self.searches[key] = search  # Kept for its request tick, the search itself is redone by a worker
+        self.queued += 1
+        self.requests.put(key)
+
+    def run(self):
+        """Nouveau tick : publie les cases changées et récupère les chemins trouvés par les processus"""
+        self.new_tick()
+        self.publish()
+        while True:
+            try:
+                key, generation, path = self.results.get_nowait()
+            except queue.Empty:
+                break
+            search = self.searches.get(key)
+            if search is None:
+                continue  # Nobody waits for it anymore
+            if generation != self.generation and not self.still_valid(path):
+                self.reissued += 1
+                self.requests.put(key)
+                continue
+            del self.searches[key]
+            search.path = path
+            search.done = True
+            self.finish(search, {unit for unit, waited in self.waiting.items() if waited == key})
+
+    def still_valid(self, path):
+        # A path from an older snapshot is as good as a new one if none of its tiles got blocked since
+        if path is None:
+            return False
+        walkable = self.map.walkable
+        stride = self.map.stride
+        return all(walkable[(y + 1) * stride + x + 1] for x, y in path)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self.processes:
+            self.requests.put(None)
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self.memory.close()
+        self.memory.unlink()
+
+    def stats(self):
+        stats = super().stats()
+        stats['workers'] = len(self.processes)
+        stats['reissued'] = self.reissued
+        return stats
@@ -8,6 +8,10 @@ class Player:
         self.civilization = civilization
         self.units = []  # Initialize the units list
         self.buildings = []
+        self.buildings_by_type = {}  # Building class -> {building: order it was added in}
+        self.drop_points = {}  # Town Centers and Camps, in the order they were added
+        self.free_farms = {}  # Farms nobody is gathering from -> order they were added in
+        self.buildings_added = 0
         self.constructing_buildings = []
         self.ai_profile = ai_profile
         self.ai = None
@@ -31,3 +35,55 @@ class Player:
 
     def has_units(self):
         return len(self.units) > 0
+
+    def add_building(self, building):
+        """
+        Ajoute building à la liste du joueur et à ses registres par type, pour que les points de dépôt
+        et les fermes libres se trouvent sans parcourir tous ses bâtiments.
+        """
+        self.buildings.append(building)
+        order = self.buildings_added
+        self.buildings_added += 1
+        self.buildings_by_type.setdefault(type(building), {})[building] = order
+        if building.is_drop_point:
+            self.drop_points[building] = order
+        if getattr(building, 'is_farmed', True) is False:
+            self.free_farms[building] = order
+
+    def remove_building(self, building):
+        self.buildings.remove(building)
+        same_type = self.buildings_by_type.get(type(building), {})
+        same_type.pop(building, None)
+        if not same_type:
+            self.buildings_by_type.pop(type(building), None)
+        self.drop_points.pop(building, None)
+        self.free_farms.pop(building, None)
+
+    def buildings_of(self, building_class):
+        """
+        :return: Les bâtiments de building_class du joueur, dans l'ordre où ils ont été ajoutés
+        """
+        return list(self.buildings_by_type.get(building_class, ()))
+
+    def set_farmed(self, farm, farmed):
+        """
+        Marque farm comme exploitée ou libre et met à jour les fermes libres du joueur.
+        """
+        if farm.is_farmed == farmed:
+            return
+        farm.is_farmed = farmed
+        if farmed:
+            self.free_farms.pop(farm, None)
+        elif farm in self.buildings_by_type.get(type(farm), ()):
+            self.free_farms[farm] = self.buildings_by_type[type(farm)][farm]
+
+    def index_buildings(self):
+        """Reconstruit les registres à partir de la liste des bâtiments (parties sauvegardées avant eux)"""
+        buildings = self.buildings
+        self.buildings = []
+        self.buildings_by_type = {}
+        self.drop_points = {}
+        self.free_farms = {}
+        self.buildings_added = 0
+        for building in buildings:
+            self.add_building(building)
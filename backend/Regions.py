@@ -0,0 +1,204 @@
+#Regions.py
+
+import numpy as np
+
+# Ring of the 8 neighbours of a tile and, for each, the ring positions it touches
+RING = [(0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1)]
+RING_LINKS = [
+    [j for j, (bx, by) in enumerate(RING) if i != j and max(abs(ax - bx), abs(ay - by)) == 1]
+    for i, (ax, ay) in enumerate(RING)
+]
+
+
+# Connected Regions Class
+class ConnectedRegions:
+    """
+    Étiquettes de composantes connexes (8-connexité, comme le A*) des cases praticables.
+    Deux cases d'étiquettes différentes ne sont reliées par aucun chemin : le pathfinding
+    peut refuser un objectif inaccessible sans explorer la carte.
+
+    Libérer une case fusionne les régions voisines (union-find). Bloquer une case ne peut
+    couper une région que si ses voisines praticables ne se touchent plus autour d'elle ;
+    dans ce cas seulement, un remplissage part de chaque groupe de voisines à tour de rôle
+    (split) : il s'arrête dès qu'ils se rejoignent, ou que tous les morceaux coupés sauf un
+    ont été parcourus. Seuls ces morceaux, les plus petits, reçoivent une nouvelle étiquette ;
+    au-delà de SPLIT_BUDGET cases parcourues, toute la carte est réétiquetée d'un coup.
+    """
+    SPLIT_BUDGET = 4000  # Tiles a local split flood may visit before relabel() is cheaper
+    def __init__(self, game_map):
+        self.map = game_map
+        self.offsets = [dy * game_map.stride + dx for dx, dy in RING]
+        self.rejections = 0  # Unreachable goals answered without a search
+        self.relabels = 0
+        self.splits = 0  # Regions cut in pieces by a blocked tile
+        self.relabel()
+
+    def relabel(self):
+        """
+        Étiquette toute la carte : les suites de cases praticables de chaque ligne (calculées avec
+        NumPy) sont reliées par union-find à celles de la ligne suivante qu'elles touchent, diagonales
+        comprises.
+        """
+        stride = self.map.stride
+        walkable = np.frombuffer(self.map.walkable, dtype=np.uint8).astype(bool)
+        # The blocked border ends every run on its own row
+        starts = np.flatnonzero(walkable[1:] & ~walkable[:-1]) + 1
+        ends = np.flatnonzero(walkable[:-1] & ~walkable[1:])  # Last tile of each run
+        # Runs of the next row that touch each run: their shifted span overlaps [start - 1, end + 1]
+        first = np.searchsorted(ends - stride, starts - 1, side='left')
+        last = np.searchsorted(starts - stride, ends + 1, side='right')
+        counts = np.maximum(last - first, 0)
+        pairs_a = np.repeat(np.arange(len(starts)), counts)
+        pairs_b = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+        run_parent = list(range(len(starts)))
+        for a, b in zip(pairs_a.tolist(), pairs_b.tolist()):
+            while run_parent[a] != a:
+                run_parent[a] = run_parent[run_parent[a]]
+                a = run_parent[a]
+            while run_parent[b] != b:
+                run_parent[b] = run_parent[run_parent[b]]
+                b = run_parent[b]
+            if a != b:
+                run_parent[max(a, b)] = min(a, b)
+        roots = np.array(run_parent, dtype=np.int64)
+        while True:
+            jumped = roots[roots]
+            if np.array_equal(jumped, roots):
+                break
+            roots = jumped
+        _, run_labels = np.unique(roots, return_inverse=True)
+        run_labels = run_labels.astype(np.int64) + 1  # 0 = blocked tile
+
+        # Paint each run with its label: +label at its start, -label after its end, then a running sum
+        marks = np.zeros(len(walkable) + 1, dtype=np.int64)
+        marks[starts] += run_labels
+        marks[ends + 1] -= run_labels
+        self.labels = np.cumsum(marks[:-1]).tolist()
+        self.parent = list(range(int(run_labels.max(initial=0)) + 1))  # Merged labels point to the label they were merged into
+        self.relabels += 1
+
+    def reset(self):
+        self.relabel()
+
+    def find(self, label):
+        parent = self.parent
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    def region(self, x, y):
+        """Retourne l'étiquette de la région de la case (0 si elle est bloquée ou hors de la carte)"""
+        if not (0 <= x < self.map.width and 0 <= y < self.map.height):
+            return 0
+        return self.find(self.labels[(y + 1) * self.map.stride + x + 1])
+
+    def reachable(self, start, goal):
+        """Indique si un chemin peut exister entre start et goal (le départ lui-même peut être bloqué)"""
+        goal_region = self.region(goal[0], goal[1])
+        if goal_region == 0:
+            return False
+        if self.region(start[0], start[1]) == goal_region:
+            return True
+        # A unit standing on a blocked tile can still step onto any free neighbour
+        index = (start[1] + 1) * self.map.stride + start[0] + 1
+        labels = self.labels
+        return any(labels[index + offset] and self.find(labels[index + offset]) == goal_region for offset in self.offsets)
+
+    def tile_changed(self, x, y, walkable):
+        index = (y + 1) * self.map.stride + x + 1
+        labels = self.labels
+        neighbor_regions = {self.find(labels[index + offset]) for offset in self.offsets if labels[index + offset]}
+
+        if walkable:
+            # The freed tile joins all the regions around it
+            if neighbor_regions:
+                region = min(neighbor_regions)
+                for other in neighbor_regions:
+                    self.parent[other] = region
+            else:
+                region = len(self.parent)
+                self.parent.append(region)
+            labels[index] = region
+            return
+
+        labels[index] = 0
+        # The region can only split if the free neighbours no longer touch each other around the tile
+        free = {i for i, offset in enumerate(self.offsets) if labels[index + offset]}
+        groups = []
+        while free:
+            group = [free.pop()]
+            stack = list(group)
+            while stack:
+                for j in RING_LINKS[stack.pop()]:
+                    if j in free:
+                        free.discard(j)
+                        group.append(j)
+                        stack.append(j)
+            groups.append([index + self.offsets[j] for j in group])
+        if len(groups) > 1:
+            self.split(groups)
+
+    def split(self, groups):
+        """
+        Remplit la carte depuis chaque groupe de cases à tour de rôle, une case par groupe et par tour.
+        Deux remplissages qui se touchent sont fusionnés : s'il n'en reste qu'un, la région n'est pas
+        coupée. Un remplissage qui s'épuise a parcouru tout un morceau coupé du reste. Le parcours
+        s'arrête quand il ne reste qu'un remplissage actif, dont le morceau garde son étiquette.
+
+        :param groups: Listes d'indices des cases praticables voisines de la case bloquée, qui ne se touchent plus
+        """
+        walkable = self.map.walkable
+        offsets = self.offsets
+        owner = {}  # tile -> flood that reached it first
+        merged = list(range(len(groups)))  # flood -> flood it joined
+        frontiers = []
+        for flood, group in enumerate(groups):
+            for tile in group:
+                owner[tile] = flood
+            frontiers.append(list(group))
+
+        def root(flood):
+            while merged[flood] != flood:
+                flood = merged[flood]
+            return flood
+
+        while True:
+            if len(owner) > self.SPLIT_BUDGET:
+                self.relabel()
+                return
+            for flood, frontier in enumerate(frontiers):
+                if not frontier:
+                    continue
+                current = frontier.pop()
+                for offset in offsets:
+                    neighbor = current + offset
+                    if not walkable[neighbor]:
+                        continue
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = flood
+                        frontier.append(neighbor)
+                    elif root(other) != root(flood):
+                        merged[root(other)] = root(flood)
+            roots = {root(flood) for flood in range(len(groups))}
+            if len(roots) == 1:
+                return  # Still one region
+            active = {root(flood) for flood, frontier in enumerate(frontiers) if frontier}
+            if len(active) <= 1:
+                break
+
+        # Every exhausted piece is cut off: new labels for them, the last active (or any) piece keeps its own
+        kept = next(iter(active)) if active else next(iter(roots))
+        new_labels = {}
+        for flood_root in roots:
+            if flood_root != kept:
+                new_labels[flood_root] = len(self.parent)
+                self.parent.append(len(self.parent))
+        labels = self.labels
+        for tile, flood in owner.items():
+            label = new_labels.get(root(flood))
+            if label is not None:
+                labels[tile] = label
+        self.splits += 1
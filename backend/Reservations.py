@@ -0,0 +1,200 @@
+#Reservations.py
+
+import heapq
+
+from Actions import Action
+
+INFINITY = float('inf')
+
+
+# Reservation Table Class
+class ReservationTable:
+    """
+    Table de réservations (case, fenêtre de temps) des unités en mouvement. Chaque chemin planifié
+    réserve ses cases pour le moment où l'unité les traversera, et sa dernière case jusqu'au
+    prochain trajet de l'unité (elle y reste pour déposer ou attaquer).
+
+    Les points de dépôt et d'attaque autour d'un bâtiment sont répartis entre les unités à partir
+    de ces réservations, et le tronçon d'un chemin qui croise celui d'une autre unité au même
+    moment est recalculé en pénalisant les cases réservées. Ce détour reste local (fenêtre autour
+    du tronçon, max_expansions cases au plus) : s'il n'aboutit pas, le chemin est gardé tel quel.
+    """
+    def __init__(self, penalty=2, max_expansions=200, margin=3):
+        self.penalty = penalty  # Extra cost of a tile reserved by another unit, in tiles
+        self.max_expansions = max_expansions  # Tiles a detour may expand
+        self.margin = margin  # Steps kept around the conflicts, and tiles around them the detour may use
+        self.windows = {}  # tile -> {unit: (start, end, tile it comes from)}
+        self.tiles = {}  # unit -> tiles it reserved, the last one being its destination
+        self.slots = 0  # Drop-off / attack slots handed out
+        self.detours = 0  # Paths planned again around other units
+        self.kept = 0  # Conflicting paths kept: no detour within the window and the expansion cap
+
+    def release(self, unit):
+        for tile in self.tiles.pop(unit, ()):
+            windows = self.windows.get(tile)
+            if windows is not None:
+                windows.pop(unit, None)
+                if not windows:
+                    del self.windows[tile]
+
+    def add(self, unit, tile, start, end, previous=None):
+        self.windows.setdefault(tile, {})[unit] = (start, end, previous)
+        self.tiles.setdefault(unit, []).append(tile)
+
+    def timings(self, path, start_tile, start_time, speed):
+        # (tile, time the unit enters it, time it leaves it, tile it comes from) along the path
+        time = start_time
+        previous = start_tile
+        for tile in path:
+            duration = (1.414 if tile[0] != previous[0] and tile[1] != previous[1] else 1) / speed
+            yield tile, time, time + duration, previous
+            time += duration
+            previous = tile
+
+    def reserve(self, unit, path, start_tile, start_time, speed):
+        """Réserve les cases de path pour les moments où l'unité les traversera"""
+        self.release(unit)
+        if not path:
+            return
+        for tile, start, end, previous in self.timings(path, start_tile, start_time, speed):
+            self.add(unit, tile, start, end, previous)
+        start, _, previous = self.windows[path[-1]][unit]
+        self.windows[path[-1]][unit] = (start, INFINITY, previous)
+
+    def is_reserved(self, tile, start, end, unit, previous=None):
+        """
+        Indique si une autre unité que unit occupe la case pendant une partie de [start, end].
+
+        :param previous: Case d'où vient unit : une unité arrivée de la même case la précède dans la même
+                         direction, la suivre n'est pas un conflit
+        """
+        for other, (other_start, other_end, other_previous) in self.windows.get(tile, {}).items():
+            if other is not unit and other_start < end and start < other_end and (previous is None or other_previous != previous):
+                return True
+        return False
+
+    def has_conflict(self, unit, path, start_tile, start_time, speed):
+        # Neither the first step (units leaving the same spot together) nor the destination (spread by
+        # choose_slot) can be walked around: only the tiles in between count
+        last = len(path) - 1
+        return any(
+            self.is_reserved(tile, start, end, unit, previous)
+            for step, (tile, start, end, previous) in enumerate(self.timings(path, start_tile, start_time, speed))
+            if 0 < step < last
+        )
+
+    def destination(self, unit):
+        tiles = self.tiles.get(unit)
+        return tiles[-1] if tiles else None
+
+    def choose_slot(self, unit, slots, current_time):
+        """
+        Choisit la case libre la plus proche parmi slots (les cases autour d'un bâtiment) pour unit.
+
+        :return: La case déjà choisie par l'unité si elle en fait partie, sinon la plus proche que
+                 personne n'occupe à son arrivée, sinon la plus proche
+        """
+        if not slots:
+            return None
+        destination = self.destination(unit)
+        if destination in slots:
+            return destination
+        x, y = unit.position
+        by_distance = sorted(slots, key=lambda tile: (abs(tile[0] - x) + abs(tile[1] - y), tile))
+        slot = by_distance[0]
+        for tile in by_distance:
+            arrival = current_time + (abs(tile[0] - x) + abs(tile[1] - y)) / unit.speed
+            if not self.is_reserved(tile, arrival, INFINITY, unit):
+                slot = tile
+                break
+        # Held at once, so that the next units of the same pass pick other slots
+        self.release(unit)
+        self.add(unit, slot, current_time, INFINITY)
+        self.slots += 1
+        return slot
+
+    def detour(self, game_map, unit, start, path, start_time, speed, max_expansions=float('inf')):
+        """
+        Recalcule le tronçon de path qui croise d'autres unités : de la case margin pas avant le premier
+        conflit à celle margin pas après le dernier, dans le rectangle qui les entoure agrandi de margin.
+
+        :param max_expansions: Budget encore disponible pour ce tick, en plus de la limite de la table
+        :return: (chemin complet passant par le détour, ou None si aucun n'a été trouvé dans ces limites,
+                 nombre de cases développées)
+        """
+        last = len(path) - 1
+        timings = list(self.timings(path, start, start_time, speed))
+        conflicts = [
+            step for step, (tile, enter, leave, previous) in enumerate(timings)
+            if 0 < step < last and self.is_reserved(tile, enter, leave, unit, previous)
+        ]
+        if not conflicts:
+            return None, 0
+        trip = [start] + path  # trip[step + 1] is path[step]
+        first = max(conflicts[0] + 1 - self.margin, 0)
+        end = min(conflicts[-1] + 1 + self.margin, len(trip) - 1)
+        xs = [tile[0] for tile in trip[first:end + 1]]
+        ys = [tile[1] for tile in trip[first:end + 1]]
+        bounds = (min(xs) - self.margin, min(ys) - self.margin, max(xs) + self.margin, max(ys) + self.margin)
+        leave_time = start_time if first == 0 else timings[first - 1][2]
+        middle, expansions = self.cooperative_search(
+            game_map, unit, trip[first], trip[end], leave_time, speed, bounds, min(self.max_expansions, max_expansions)
+        )
+        if middle is None:
+            self.kept += 1
+            return None, expansions
+        return trip[1:first + 1] + middle + trip[end + 1:], expansions
+
+    def cooperative_search(self, game_map, unit, start, goal, start_time, speed, bounds, max_expansions):
+        """
+        A* de Action._astar_search dont les cases réservées par d'autres unités au moment où l'unité
+        y passerait coûtent penalty cases de plus : l'unité les contourne quand le détour est court.
+
+        :param bounds: (x min, y min, x max, y max) des cases que la recherche peut utiliser
+        :return: (chemin de start (exclu) à goal, ou None si goal n'est pas atteint en max_expansions cases, cases développées)
+        """
+        open_list = [(0, start)]
+        came_from = {}
+        g_cost = {start: 0}
+        time_at = {start: start_time}
+        closed_set = set()
+        walkable = game_map.walkable
+        stride = game_map.stride
+        goal_x, goal_y = goal
+        min_x, min_y, max_x, max_y = bounds
+        expansions = 0
+        while open_list and expansions < max_expansions:
+            _, current = heapq.heappop(open_list)
+            if current == goal:
+                path = []
+                while current in came_from:
+                    path.append(current)
+                    current = came_from[current]
+                path.reverse()
+                return path, expansions
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+            expansions += 1
+            x, y = current
+            for dx, dy, move_cost in Action.NEIGHBOR_STEPS:
+                nx, ny = x + dx, y + dy
+                if not (min_x <= nx <= max_x and min_y <= ny <= max_y) or not walkable[(ny + 1) * stride + nx + 1]:
+                    continue
+                neighbor = (nx, ny)
+                if neighbor in closed_set:
+                    continue
+                enter = time_at[current]
+                leave = enter + move_cost / speed
+                tentative_g_cost = g_cost[current] + move_cost
+                if neighbor in self.windows and self.is_reserved(neighbor, enter, leave, unit, current):
+                    tentative_g_cost += self.penalty
+                if tentative_g_cost < g_cost.get(neighbor, INFINITY):
+                    g_cost[neighbor] = tentative_g_cost
+                    time_at[neighbor] = leave
+                    came_from[neighbor] = current
+                    heapq.heappush(open_list, (tentative_g_cost + abs(nx - goal_x) + abs(ny - goal_y), neighbor))
+        return None, expansions
+
+    def stats(self):
+        return {'slots': self.slots, 'detours': self.detours, 'kept': self.kept, 'units': len(self.tiles)}
@@ -0,0 +1,123 @@
+#Routes.py
+
+from collections import OrderedDict
+
+from Flow_Field import FlowField
+
+
+# Route Table Class
+class RouteTable:
+    """
+    Trajets des villageois entre les ressources et les points de dépôt (Town Center, Camp).
+    Chaque point de dépôt a un champ de flux partant des cases libres autour de lui : un seul
+    Dijkstra, prolongé à la demande, sert les villageois de tous les amas de ressources, à l'aller
+    (descente du champ depuis la ressource, lue à l'envers) comme au retour.
+
+    Le champ d'un point de dépôt est créé au premier dépôt (un nouveau Camp a donc le sien dès que
+    des villageois l'utilisent) et oublié quand le bâtiment est détruit. Son Dijkstra est payé par
+    le budget de cases du tick. Une case libérée (amas épuisé) ou bloquée (nouveau bâtiment) est
+    réparée sur place : seules les distances qui passaient par une case bloquée sont reprises, et
+    le champ n'est reconstruit que si plus de max_repair cases en dépendaient.
+    """
+    def __init__(self, game_map, max_fields=16, max_repair=2000):
+        self.map = game_map
+        self.max_fields = max_fields
+        self.max_repair = max_repair
+        self.fields = OrderedDict()  # drop point -> FlowField, least recently used first
+        self.slots = {}  # tile around a drop point -> drop point
+        self.builds = 0
+        self.routes = 0  # Paths served from a field
+        self.repairs = 0  # Blocked tiles repaired in place
+        self.invalidations = 0
+
+    def register(self, drop_point, tiles):
+        """
+        :param drop_point: Position du Town Center ou du Camp
+        :param tiles: Cases libres autour du bâtiment, où les villageois déposent
+        """
+        if drop_point in self.fields or not tiles:
+            return
+        self.fields[drop_point] = FlowField(self.map, tiles)
+        for tile in tiles:
+            self.slots[tile] = drop_point
+        self.builds += 1
+        while len(self.fields) > self.max_fields:
+            self.forget(next(iter(self.fields)))
+
+    def forget(self, drop_point):
+        field = self.fields.pop(drop_point, None)
+        if field is None:
+            return
+        for tile in field.goals:
+            if self.slots.get(tile) == drop_point:
+                del self.slots[tile]
+
+    def path(self, start, goal, connect):
+        """
+        Trajet vers une case autour d'un point de dépôt, ou depuis l'une d'elles.
+
+        :param connect: Recherche (départ, arrivée) -> chemin pour le bout de trajet entre la case
+                        où mène le champ et celle de l'unité, le long du bâtiment
+        :return: (True, liste des cases de start (exclu) à goal (inclus), ou None si aucun champ ne couvre
+                 ce trajet), ou (False, None) si le budget du tick est épuisé avant que le champ atteigne start
+        """
+        path_queue = self.map.path_queue
+        drop_point = self.slots.get(goal)
+        if drop_point is not None:
+            # Returning: down the field to the nearest tile around the building, then along it to goal
+            field = self.fields[drop_point]
+            self.fields.move_to_end(drop_point)
+            ready, path = field.path(start, path_queue)
+            if path is None:
+                return ready, None
+            end = path[-1] if path else start
+            if end != goal:
+                rest = connect(end, goal)
+                if rest is None:
+                    return True, None
+                path = path + rest
+            self.routes += 1
+            return True, path
+
+        drop_point = self.slots.get(start)
+        if drop_point is not None:
+            # Leaving: the way down the field from goal, walked backwards
+            field = self.fields[drop_point]
+            self.fields.move_to_end(drop_point)
+            ready, back = field.path(goal, path_queue)
+            if not back:
+                return ready, None
+            end = back[-1]
+            path = back[-2::-1] + [goal]
+            if end != start:
+                head = connect(start, end)
+                if head is None:
+                    return True, None
+                path = head + path
+            self.routes += 1
+            return True, path
+        return True, None
+
+    def tile_changed(self, x, y, walkable):
+        index = (y + 1) * self.map.stride + x + 1
+        for drop_point, field in list(self.fields.items()):
+            if walkable:
+                field.tile_freed(index)
+                continue
+            reset = field.tile_blocked(index, self.max_repair)
+            if reset is None:
+                self.forget(drop_point)
+                self.invalidations += 1
+            elif reset:
+                self.repairs += 1
+
+    def reset(self):
+        self.fields.clear()
+        self.slots.clear()
+
+    def stats(self):
+        return {
+            'fields': len(self.fields), 'builds': self.builds, 'routes': self.routes,
+            'routes_per_build': self.routes / self.builds if self.builds else 0.0,
+            'repairs': self.repairs, 'invalidations': self.invalidations
+        }
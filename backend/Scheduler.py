@@ -0,0 +1,140 @@
+#Scheduler.py
+
+import heapq
+
+from Units import *
+from Building import *
+
+
+# Tick Scheduler Class
+class TickScheduler:
+    """
+    File de priorité des unités et bâtiments, triée sur la prochaine date (temps simulé)
+    à laquelle chacun a besoin d'être mis à jour. Seules les entités échues sont traitées
+    à chaque passe : une unité inactive ou occupée à une longue tâche ne coûte rien
+    jusqu'à son réveil.
+    """
+    KEEP_SCAN_INTERVAL = 0.5  # Keep sans cible : recherche d'ennemis toutes les 0.5s
+
+    def __init__(self):
+        self.heap = []  # (wake_time, order, entity)
+        self.wake_times = {}  # entity -> wake_time of its only valid entry
+        self.signatures = {}  # entity -> task signature when it was scheduled
+        self.counter = 0  # Tie-breaker so equal wake times keep insertion order
+
+    def __len__(self):
+        return len(self.wake_times)
+
+    def __contains__(self, entity):
+        return entity in self.wake_times
+
+    def schedule(self, entity, wake_time):
+        # Older entries of the entity become stale and are skipped when popped
+        self.wake_times[entity] = wake_time
+        self.signatures[entity] = self.signature(entity)
+        self.counter += 1
+        heapq.heappush(self.heap, (wake_time, self.counter, entity))
+
+    def wake(self, entity, current_time=float('-inf')):
+        """Fait traiter l'entité dès la prochaine passe (ex : unité attaquée pendant qu'elle récolte)"""
+        if self.wake_times.get(entity, float('inf')) > current_time:
+            self.schedule(entity, current_time)
+
+    def cancel(self, entity):
+        self.wake_times.pop(entity, None)
+        self.signatures.pop(entity, None)
+
+    def pop_due(self, current_time):
+        due = []
+        while self.heap and self.heap[0][0] <= current_time:
+            wake_time, _, entity = heapq.heappop(self.heap)
+            if self.wake_times.get(entity) == wake_time:
+                del self.wake_times[entity]
+                del self.signatures[entity]
+                due.append(entity)
+        return due
+
+    @staticmethod
+    def signature(entity):
+        if isinstance(entity, Unit):
+            return (entity.task, entity.target_position, id(entity.target_attack), getattr(entity, 'target_building', None))
+        return None
+
+    @staticmethod
+    def is_active(entity):
+        if isinstance(entity, Unit):
+            return entity.task is not None or entity.target_position is not None
+        return bool(getattr(entity, 'training_queue', None)) or isinstance(entity, Keep)
+
+    def sync(self, players, current_time):
+        """
+        Rattrape les changements faits hors du scheduler (décisions de l'IA, nouvelles files
+        d'entraînement, nouveaux Keeps) : toute entité active non planifiée, ou dont la tâche a
+        changé depuis sa planification, est réveillée à la prochaine passe.
+        """
+        for player in players:
+            for unit in player.units:
+                if unit in self.wake_times:
+                    if self.signatures[unit] != self.signature(unit):
+                        self.schedule(unit, current_time)
+                elif self.is_active(unit):
+                    self.schedule(unit, current_time)
+            for building in player.buildings:
+                if building not in self.wake_times and self.is_active(building):
+                    self.schedule(building, current_time)
+
+    @staticmethod
+    def remaining_amount(game_map, unit):
+        # What is left on the tile the unit gathers from, None if unknown
+        if game_map is None or unit.target_resource is None:
+            return None
+        tile = game_map.grid[unit.target_resource[1]][unit.target_resource[0]]
+        if tile.resource is not None:
+            return tile.resource.amount
+        if tile.building is not None and hasattr(tile.building, 'food'):
+            return tile.building.food
+        return 0
+
+    def next_update_time(self, entity, current_time, game_map=None):
+        """
+        Retourne la prochaine date à laquelle l'entité doit être traitée, ou None si elle est inactive
+
+        :param game_map: Carte de la partie, pour réveiller un récolteur dès que sa case peut être épuisée
+        """
+        if not self.is_active(entity):
+            return None
+
+        if isinstance(entity, Unit):
+            unit = entity
+            if unit.task == "attacking" and hasattr(unit, 'last_hit_time'):
+                return max(current_time, unit.last_hit_time + 1.0)  # Attack cooldown
+            if unit.task == "gathering" and unit.target_position is None and hasattr(unit, 'last_gather_time'):
+                # Sleep until the unit is full, or until it may have emptied its tile
+                resource_type = unit.last_gathered
+                space_left = unit.carry_capacity - unit.carrying.get(resource_type, 0)
+                remaining = self.remaining_amount(game_map, unit)
+                if remaining is not None:
+                    space_left = min(space_left, remaining)
+                return max(current_time, unit.last_gather_time + space_left / unit.gather_rate)
+            if unit.task == "constructing" and unit.target_position is None and hasattr(unit, 'start_building'):
+                construction_entry = next(
+                    (b for b in unit.player.constructing_buildings if b["position"] == unit.target_building),
+                    None
+                )
+                if construction_entry:
+                    num_workers = construction_entry.get("num_workers", 1)
+                    actual_building_time = 3 * unit.construction_type(unit.player).build_time / (num_workers + 2)
+                    return max(current_time, unit.start_building + actual_building_time)
+            return current_time  # Moving or fighting: next pass
+
+        building = entity
+        if getattr(building, 'training_queue', None):
+            unit = building.training_queue[0]
+            if getattr(unit, 'training_start', None) is not None:
+                return max(current_time, unit.training_start + unit.training_time)
+            return current_time
+        if isinstance(building, Keep):
+            if building.target is not None:
+                return max(current_time, building.last_attack_time + 1)
+            return current_time + self.KEEP_SCAN_INTERVAL
+        return None
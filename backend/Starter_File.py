@@ -866,4 +866,52 @@ def start_game(stdscr, save_file=None):
             sauvegarde=False
         )
 
-    game_engine.run(stdscr)
\ No newline at end of file
+    game_engine.run(stdscr)
+
+def create_players(civilizations, ai_modes):
+    # Fill the shared players list (used by Building and IA) without going through the menus
+    players.clear()
+    for i, civilization in enumerate(civilizations):
+        player_id = i + 1
+        players.append(Player(
+            f'Player {player_id}',
+            civilization,
+            ai_modes[i % len(ai_modes)],
+            player_id=player_id
+        ))
+    return players
+
+def start_headless(mode="Utopia", size=(120, 120), civilizations=("Means", "Means"), ai_modes=("aggressive", "defensive"), max_ticks=None, seed=None):
+    global GameMode, map_size
+    GameMode = mode
+    map_size = tuple(size)
+    create_players(civilizations, ai_modes)
+
+    from Game_Engine import GameEngine
+    game_engine = GameEngine(
+        game_mode=GameMode,
+        map_size=map_size,
+        players=players,
+        sauvegarde=False,
+        seed=seed
+    )
+    stats = game_engine.run_headless(max_ticks=max_ticks)
+
+    print(f"Winner: {stats['winner'] or 'none'}")
+    print(f"{stats['ticks']} ticks ({stats['sim_time']:.1f}s of game time) in {stats['elapsed']:.2f}s ({stats['ticks_per_second']:.1f} ticks/s)")
+    path_stats = stats['path_cache']
+    print(f"Path cache: {path_stats['hits']} hits, {path_stats['misses']} misses ({path_stats['hit_rate']:.0%}), {path_stats['invalidations']} invalidated, {stats['unreachable_rejected']} unreachable goals rejected")
+    flow_stats = stats['flow_fields']
+    print(f"Flow fields: {flow_stats['builds']} built, {flow_stats['paths']} paths followed, {flow_stats['invalidations']} invalidated")
+    repair_stats = stats['path_repairs']
+    print(f"Path repairs: {repair_stats['searches']} cut paths repaired locally with D* Lite, {repair_stats['repairs']} incremental repairs, {repair_stats['fallbacks']} fallbacks to a full search")
+    queue_stats = stats['path_queue']
+    if queue_stats is not None:
+        print(f"Path queue: {queue_stats['completed']} searches completed, {queue_stats['queued']} queued over several ticks ({queue_stats['average_ticks']:.1f} ticks to path on average), {queue_stats['deferrals']} flow field / detour searches delayed to the next tick")
+        if 'workers' in queue_stats:
+            print(f"Path workers: {queue_stats['workers']} processes, {queue_stats['reissued']} results from an outdated snapshot searched again")
+    route_stats = stats['routes']
+    print(f"Routes: {route_stats['routes']} villager trips served by {route_stats['builds']} drop point fields ({route_stats['routes_per_build']:.1f} trips per field, {route_stats['repairs']} repaired in place, {route_stats['invalidations']} rebuilt)")
+    reservation_stats = stats['reservations']
+    print(f"Reservations: {reservation_stats['slots']} drop-off / attack slots handed out, {reservation_stats['detours']} paths planned around other units ({reservation_stats['kept']} kept: no detour close enough)")
+    return stats
@@ -1,13 +1,143 @@
 import random
 import math
+
+import numpy as np
+
 from Building import TownCenter
 from logger import debug_print
 from Starter_File import global_speedS
 
+
+def _as_number(value):
+    # Integral values come back as int, as they were stored before the arrays (they are used as grid indices)
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+# Unit Store Class
+class UnitStore:
+    """
+    Stockage en colonnes (struct-of-arrays) des champs chauds des unités : position, hp, vitesse,
+    attaque, portée, tâche et timers de déplacement/attaque, dans des tableaux NumPy indexés par
+    l'id de l'unité. Les objets Unit ne sont que des vues sur une ligne de ces tableaux, ce qui
+    permet de traiter le mouvement et le combat par opérations sur tableaux.
+    """
+    FLOAT_FIELDS = ("x", "y", "hp", "speed", "attack", "range", "last_move_time", "last_hit_time")
+    TASKS = [None, "gathering", "returning", "marching", "going_to_battle", "attacking", "is_attacked",
+             "going_to_construction_site", "constructing", "defending", "encircling"]
+    # Octants from angle 0 by steps of 45 degrees, as returned by Action.get_direction
+    DIRECTIONS = ["southeast", "south", "southwest", "west", "northwest", "north", "northeast", "east"]
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.size = 0  # Number of ids handed out (ids of dead units are not reused: old views must keep reading their own hp)
+        for field in self.FLOAT_FIELDS:
+            setattr(self, field, np.full(capacity, np.nan))
+        self.task = np.zeros(capacity, dtype=np.int16)
+        self.direction = np.zeros(capacity, dtype=np.int16)
+        self.alive = np.zeros(capacity, dtype=bool)  # Spawned on the map and not killed
+        self.units = []  # id -> Unit view
+        self.task_codes = {task: code for code, task in enumerate(self.TASKS)}
+        self.tasks = list(self.TASKS)
+        self.direction_codes = {direction: code for code, direction in enumerate(self.DIRECTIONS)}
+        self.directions = list(self.DIRECTIONS)
+
+    def __len__(self):
+        return int(self.alive[:self.size].sum())
+
+    def allocate(self, unit):
+        if self.size == self.capacity:
+            self.grow()
+        uid = self.size
+        self.size += 1
+        self.units.append(unit)
+        return uid  # Not alive until the unit is spawned on the map
+
+    def grow(self):
+        new_capacity = self.capacity * 2
+        for field in self.FLOAT_FIELDS:
+            column = np.full(new_capacity, np.nan)
+            column[:self.capacity] = getattr(self, field)
+            setattr(self, field, column)
+        for field in ("task", "direction"):
+            column = np.zeros(new_capacity, dtype=np.int16)
+            column[:self.capacity] = getattr(self, field)
+            setattr(self, field, column)
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self.capacity] = self.alive
+        self.alive = alive
+        self.capacity = new_capacity
+
+    def release(self, uid):
+        self.alive[uid] = False
+
+    def task_code(self, task):
+        code = self.task_codes.get(task)
+        if code is None:
+            code = len(self.tasks)
+            self.tasks.append(task)
+            self.task_codes[task] = code
+        return code
+
+    def direction_code(self, direction):
+        code = self.direction_codes.get(direction)
+        if code is None:  # Sprite specific names such as "en_bas"
+            code = len(self.directions)
+            self.directions.append(direction)
+            self.direction_codes[direction] = code
+        return code
+
+    def alive_ids(self):
+        return np.flatnonzero(self.alive[:self.size])
+
+    def ids_with_task(self, *tasks):
+        codes = [self.task_codes[task] for task in tasks if task in self.task_codes]
+        mask = self.alive[:self.size] & np.isin(self.task[:self.size], codes)
+        return np.flatnonzero(mask)
+
+    def positions(self, ids):
+        return np.column_stack((self.x[ids], self.y[ids]))
+
+    def distances(self, ids, point):
+        return np.hypot(self.x[ids] - point[0], self.y[ids] - point[1])
+
+    def ready_to_hit(self, ids, current_time, cooldown=1.0):
+        # Units that never hit (NaN) or whose cooldown is over
+        last_hit = self.last_hit_time[ids]
+        return np.isnan(last_hit) | (current_time - last_hit >= cooldown)
+
+
+def _column(field, optional=False):
+    def getter(self):
+        value = getattr(self.store, field)[self.uid]
+        if optional and value != value:  # NaN = attribute not set
+            raise AttributeError(field)
+        return _as_number(value)
+
+    def setter(self, value):
+        getattr(self.store, field)[self.uid] = value
+
+    def deleter(self):
+        getattr(self.store, field)[self.uid] = np.nan
+
+    return property(getter, setter, deleter)
+
+
 # Unit Class
 class Unit:
     global_speed = global_speedS
+    current_store = UnitStore()  # Store of the running game (replaced by GameEngine for each game)
+
+    hp = _column("hp")
+    attack = _column("attack")
+    speed = _column("speed")
+    range = _column("range")
+    last_move_time = _column("last_move_time", optional=True)
+    last_hit_time = _column("last_hit_time", optional=True)
+
     def __init__(self, player, hp, cost, attack, speed, symbol="u", training_time=0, position=(0.0, 0.0)):
+        self.store = Unit.current_store
+        self.uid = self.store.allocate(self)
         self.player = player
         self.hp = hp
         self.cost = cost
@@ -28,6 +158,45 @@ class Unit:
 
     def __str__(self):
         return self.symbol  # Ensure the building is represented by just the symbol
+
+    @property
+    def position(self):
+        return (_as_number(self.store.x[self.uid]), _as_number(self.store.y[self.uid]))
+
+    @position.setter
+    def position(self, new_position):
+        self.store.x[self.uid] = new_position[0]
+        self.store.y[self.uid] = new_position[1]
+
+    @property
+    def task(self):
+        return self.store.tasks[self.store.task[self.uid]]
+
+    @task.setter
+    def task(self, task):
+        self.store.task[self.uid] = self.store.task_code(task)
+
+    @property
+    def direction(self):
+        return self.store.directions[self.store.direction[self.uid]]
+
+    @direction.setter
+    def direction(self, direction):
+        self.store.direction[self.uid] = self.store.direction_code(direction)
+
+    def __setstate__(self, state):
+        # Units saved before the UnitStore kept these fields in their __dict__: move them into the current store
+        if 'store' not in state:
+            store = Unit.current_store
+            columns = {field: state.pop(field) for field in ("hp", "attack", "speed", "range", "last_move_time", "last_hit_time", "position", "task", "direction") if field in state}
+            self.__dict__.update(state)
+            self.store = store
+            self.uid = store.allocate(self)
+            for field, value in columns.items():
+                setattr(self, field, value)
+            store.alive[self.uid] = True
+        else:
+            self.__dict__.update(state)
     
     def move(self, new_position):
         self.position = new_position
@@ -103,6 +272,7 @@ class Unit:
             if not building or building.is_walkable():
                 player.units.append(unit)
                 unit.position = (x, y)
+                unit.store.alive[unit.uid] = True
                 player.population += 1
                 game_map.place_unit(x, y, unit)
                 return unit
@@ -171,6 +341,17 @@ class Unit:
             if unit_to_kill in player.ai.defending_units:
                 player.ai.defending_units.remove(unit_to_kill)
             player.population -= 1  # Decrease the player's population
+            if game_map.scheduler is not None:
+                game_map.scheduler.cancel(unit_to_kill)
+            if game_map.flow_fields is not None:
+                game_map.flow_fields.release(unit_to_kill)
+            if game_map.path_repairs is not None:
+                game_map.path_repairs.release(unit_to_kill)
+            if game_map.path_queue is not None:
+                game_map.path_queue.release(unit_to_kill)
+            if game_map.reservations is not None:
+                game_map.reservations.release(unit_to_kill)
+            unit_to_kill.store.release(unit_to_kill.uid)
             x, y = unit_to_kill.position
             game_map.remove_unit(int(x), int(y), unit_to_kill)  # Assuming game_map is a property of the player
             debug_print(f"Unit {unit_to_kill.name} belonging to {player.name} at ({x}, {y}) killed. (RIP)", 'DarkRed')
@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import heapq
+import random
+import argparse
+
+# Ajouter le chemin du projet à sys.path pour ne pas avoir à le faire dans le terminal
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+import config
+from frontend.Terrain import Map, Gold
+from Actions import Action
+from Hierarchical_Path import HierarchicalPathfinder
+from Jump_Point_Search import JumpPointSearch
+from Flow_Field import FlowField
+
+
+def legacy_is_tile_free_for_unit(game_map, x, y):
+    # Tile check as it was done before the walkability bitmap: bounds, Tile attributes, is_walkable()
+    if 0 <= x < game_map.width and 0 <= y < game_map.height:
+        tile = game_map.grid[y][x]
+        return tile.resource is None and (tile.building is None or tile.building.is_walkable())
+    return False
+
+
+def legacy_astar(action, start, goal):
+    """A* de référence : voisins filtrés par des appels à legacy_is_tile_free_for_unit"""
+    game_map = action.map
+    open_list = [(0, start)]
+    came_from = {}
+    g_cost = {start: 0}
+    closed_set = set()
+
+    while open_list:
+        _, current = heapq.heappop(open_list)
+        if current == goal:
+            return action._reconstruct_path(came_from, current)
+        closed_set.add(current)
+
+        for dx, dy, _ in Action.NEIGHBOR_STEPS:
+            neighbor = (current[0] + dx, current[1] + dy)
+            if not legacy_is_tile_free_for_unit(game_map, neighbor[0], neighbor[1]):
+                continue
+            if neighbor in closed_set:
+                continue
+            tentative_g_cost = g_cost[current] + action._move_cost(current, neighbor)
+            if neighbor not in g_cost or tentative_g_cost < g_cost[neighbor]:
+                g_cost[neighbor] = tentative_g_cost
+                priority = tentative_g_cost + abs(neighbor[0] - goal[0]) + abs(neighbor[1] - goal[1])
+                heapq.heappush(open_list, (priority, neighbor))
+                came_from[neighbor] = current
+    return None
+
+
+def random_free_tile(game_map, rng):
+    while True:
+        x = rng.randrange(game_map.width)
+        y = rng.randrange(game_map.height)
+        if game_map.is_tile_free_for_unit(x, y):
+            return (x, y)
+
+
+def add_walls(game_map, spacing=30):
+    # Serpentine walls with a gap alternately at the top and the bottom: worst case for a greedy grid A*
+    for i, x in enumerate(range(spacing, game_map.width, spacing)):
+        gap = 10 if i % 2 == 0 else game_map.height - 10
+        for y in range(game_map.height):
+            if abs(y - gap) > 2:
+                game_map.set_resource(x, y, Gold())
+
+
+def is_valid_path(game_map, start, goal, path):
+    previous = start
+    for step in path:
+        if max(abs(step[0] - previous[0]), abs(step[1] - previous[1])) != 1 or not game_map.is_tile_free_for_unit(*step):
+            return False
+        previous = step
+    return previous == goal
+
+
+def time_queries(pathfinder, queries):
+    start = time.perf_counter()
+    paths = [pathfinder(start_tile, goal_tile) for start_tile, goal_tile in queries]
+    return time.perf_counter() - start, paths
+
+
+def run_benchmark(map_size, style, num_queries, seed, names):
+    """Compare les pathfinders demandés sur une carte d'un style donné (un GameMode, ou Utopia avec des murs)"""
+    mode = "Utopia" if style == "Walls" else style
+    game_map = Map(*map_size, game_mode=mode, seed=seed)
+    if style == "Walls":
+        add_walls(game_map)
+    action = Action(game_map)
+    hierarchical = HierarchicalPathfinder(game_map, config.hpa_cluster_size)
+    jump_points = JumpPointSearch(game_map)
+    game_map.walkability_listeners = [hierarchical]
+    rng = random.Random(seed)
+    queries = [(random_free_tile(game_map, rng), random_free_tile(game_map, rng)) for _ in range(num_queries)]
+
+    pathfinders = {
+        "legacy": ("A* per-tile checks", lambda s, g: legacy_astar(action, s, g), None),
+        "astar": ("A* bitmap", action._astar_search, action),
+        "hpa": ("HPA*", hierarchical.find_path, None),
+        "jps": ("Jump Point Search", jump_points.find_path, jump_points),
+    }
+    print(f"{map_size[0]}x{map_size[1]} {style}, {num_queries} queries")
+    reference_time = None
+    for name in names:
+        label, pathfinder, counter = pathfinders[name]
+        expansions_before = counter.expansions if counter else 0
+        elapsed, paths = time_queries(pathfinder, queries)
+        found = sum(path is not None for path in paths)
+        valid = all(is_valid_path(game_map, s, g, path) for (s, g), path in zip(queries, paths) if path is not None)
+        expansions = f"{(counter.expansions - expansions_before) / num_queries:.0f} nodes/query" if counter else "-"
+        reference_time = reference_time or elapsed
+        print(f"  {label:<20}: {elapsed:.3f}s ({elapsed / num_queries * 1000:.1f} ms/query), {expansions}, "
+              f"{found} paths found{'' if valid else ', INVALID PATHS'}, x{reference_time / elapsed:.2f}")
+
+
+def run_group_benchmark(map_size, style, group_sizes, seed):
+    """Compare un A* par unité et un champ de flux partagé pour des groupes allant vers la même case"""
+    mode = "Utopia" if style == "Walls" else style
+    game_map = Map(*map_size, game_mode=mode, seed=seed)
+    if style == "Walls":
+        add_walls(game_map)
+    action = Action(game_map)
+    rng = random.Random(seed)
+    goal = random_free_tile(game_map, rng)
+    center = random_free_tile(game_map, rng)
+    print(f"{map_size[0]}x{map_size[1]} {style}, groups heading to {goal}")
+    for group_size in group_sizes:
+        starts = []
+        while len(starts) < group_size:
+            x, y = center[0] + rng.randint(-6, 6), center[1] + rng.randint(-6, 6)
+            if game_map.is_tile_free_for_unit(x, y):
+                starts.append((x, y))
+        astar_time, _ = time_queries(action._astar_search, [(start, goal) for start in starts])
+        field_start = time.perf_counter()
+        field = FlowField(game_map, [goal])
+        paths = [field.path(start)[1] for start in starts]
+        field_time = time.perf_counter() - field_start
+        valid = all(is_valid_path(game_map, start, goal, path) for start, path in zip(starts, paths) if path is not None)
+        print(f"  {group_size:>3} units: A* per unit {astar_time * 1000:.1f}ms, flow field {field_time * 1000:.1f}ms"
+              f"{'' if valid else ', INVALID PATHS'}, x{astar_time / field_time:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pathfinders on generated maps.")
+    parser.add_argument("--map-size", type=int, nargs=2, default=[250, 250], metavar=("WIDTH", "HEIGHT"), help="Map size (default=250 250).")
+    parser.add_argument(
+        "--styles",
+        nargs="+",
+        choices=["Utopia", "Gold Rush", "Walls"],
+        default=["Utopia", "Gold Rush", "Walls"],
+        help="Map styles: the two game modes, and Utopia crossed by serpentine walls (default=all)."
+    )
+    parser.add_argument("--queries", type=int, default=50, help="Number of start/goal pairs per map (default=50).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the maps and of the queries (default=0).")
+    parser.add_argument(
+        "--pathfinders",
+        nargs="+",
+        choices=["legacy", "astar", "hpa", "jps"],
+        default=["legacy", "astar", "hpa", "jps"],
+        help="Pathfinders to compare: per-tile checks A*, bitmap A*, hierarchical, jump point search (default=all)."
+    )
+    parser.add_argument(
+        "--group-sizes",
+        type=int,
+        nargs="+",
+        default=None,
+        metavar="UNITS",
+        help="Instead of the pathfinders, compare one A* per unit with a shared flow field for groups of these sizes."
+    )
+    args = parser.parse_args()
+
+    for style in args.styles:
+        if args.group_sizes:
+            run_group_benchmark(args.map_size, style, args.group_sizes, args.seed)
+        else:
+            run_benchmark(args.map_size, style, args.queries, args.seed, args.pathfinders)
@@ -1,2 +1,11 @@
 # config.py
 debug_mode = False  # Shared global variable for debug mode
+map_cache_dir = "../assets/annex/map_cache"  # Cache of the maps of seeded games (None to disable)
+pathfinder = "astar"  # "astar" (grid A*), "hpa" (hierarchical, for large maps) or "jps" (jump point search, open terrain)
+hpa_cluster_size = 16  # Side of the HPA* clusters in tiles
+flow_field_min_units = 10  # Units heading to the same tile before they share a flow field (below, one A* each is cheaper on open maps)
+repair_max_expansions = 500  # Tiles a D* Lite path repair may expand before the unit falls back on a full search
+path_node_budget = 2000  # Tiles the grid searches (A*, flow fields, detours) may expand per tick, longer searches resume at the next ticks (None: each search at once)
+path_workers = 0  # Worker processes for the searches too long for path_node_budget (0: resumed in the game loop instead)
+reservation_penalty = 2  # Extra cost, in tiles, of stepping on a tile another unit holds at the same time
+detour_max_expansions = 200  # Tiles a detour around reserved tiles may expand before the unit keeps its path as is
@@ -8,7 +8,7 @@ import config
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
-from backend.Starter_File import start_menu
+from backend.Starter_File import start_menu, start_headless
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Launch game with or without save and debug mode.")
@@ -23,6 +23,76 @@ if __name__ == "__main__":
         default=False, 
         help="Enable debug mode (default=False)."
     )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        default=False,
+        help="Run an AI-only game without terminal or GUI and report ticks per second."
+    )
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=None,
+        help="Maximum number of ticks in headless mode (default: until victory)."
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["Utopia", "Gold Rush"],
+        default="Utopia",
+        help="Game mode in headless mode (default=Utopia)."
+    )
+    parser.add_argument(
+        "--map-size",
+        type=int,
+        nargs=2,
+        default=[120, 120],
+        metavar=("WIDTH", "HEIGHT"),
+        help="Map size in headless mode (default=120 120)."
+    )
+    parser.add_argument(
+        "--civilizations",
+        nargs="+",
+        choices=["Means", "Leans", "Marines"],
+        default=["Means", "Means"],
+        help="Civilization of each player in headless mode, one per player (default=Means Means)."
+    )
+    parser.add_argument(
+        "--ai-modes",
+        nargs="+",
+        choices=["aggressive", "defensive"],
+        default=["aggressive", "defensive"],
+        help="AI profiles assigned to the players in turn in headless mode (default=aggressive defensive)."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed for a reproducible headless game (optional)."
+    )
+    parser.add_argument(
+        "--pathfinder",
+        choices=["astar", "hpa", "jps"],
+        default=config.pathfinder,
+        help=f"Pathfinding algorithm: grid A*, hierarchical HPA* for large maps or jump point search (default={config.pathfinder})."
+    )
+    parser.add_argument(
+        "--path-workers",
+        type=int,
+        default=config.path_workers,
+        help=f"Worker processes for the long path searches, 0 to keep them in the game loop (default={config.path_workers})."
+    )
     args = parser.parse_args()
     config.debug_mode = args.debug
-    start_menu(save_file=args.save)
+    config.pathfinder = args.pathfinder
+    config.path_workers = args.path_workers
+    if args.headless:
+        start_headless(
+            mode=args.mode,
+            size=args.map_size,
+            civilizations=args.civilizations,
+            ai_modes=args.ai_modes,
+            max_ticks=args.ticks,
+            seed=args.seed
+        )
+    else:
+        start_menu(save_file=args.save)
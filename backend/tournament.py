@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+# Ajouter le chemin du projet à sys.path pour ne pas avoir à le faire dans le terminal
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+
+def play_match(match):
+    """
+    Joue une partie IA contre IA sans affichage (un match par processus du pool).
+
+    :param match: Dictionnaire décrivant le match (id, seed, mode, map_size, civilizations, ai_modes, max_ticks)
+    :return: Dictionnaire avec le gagnant, la durée du match et les ressources de chaque joueur
+    """
+    from backend.Starter_File import create_players
+    from Game_Engine import GameEngine
+
+    players = create_players(match['civilizations'], match['ai_modes'])
+    game_engine = GameEngine(
+        game_mode=match['mode'],
+        map_size=tuple(match['map_size']),
+        players=players,
+        sauvegarde=False,
+        seed=match['seed']
+    )
+    stats = game_engine.run_headless(max_ticks=match['max_ticks'])
+
+    winner = next((p for p in players if p.name == stats['winner']), None)
+    return {
+        **match,
+        'winner': stats['winner'],
+        'winner_ai_mode': winner.ai_profile if winner else None,
+        'ticks': stats['ticks'],
+        'sim_time': stats['sim_time'],
+        'elapsed': stats['elapsed'],
+        'players': [
+            {
+                'name': player.name,
+                'civilization': player.civilization,
+                'ai_mode': player.ai_profile,
+                'units': len(player.units),
+                'buildings': len(player.buildings),
+                'resources': dict(player.owned_resources),
+            }
+            for player in players
+        ],
+    }
+
+
+def build_matches(num_matches, modes, map_size, civilizations, ai_modes, base_seed, max_ticks, rotate_profiles):
+    matches = []
+    for i in range(num_matches):
+        # Rotate the AI profiles between seats so no profile always gets the same spawn
+        shift = i % len(ai_modes) if rotate_profiles else 0
+        matches.append({
+            'match': i,
+            'seed': base_seed + i,
+            'mode': modes[i % len(modes)],
+            'map_size': list(map_size),
+            'civilizations': list(civilizations),
+            'ai_modes': list(ai_modes[shift:] + ai_modes[:shift]),
+            'max_ticks': max_ticks,
+        })
+    return matches
+
+
+def run_tournament(matches, workers=None):
+    results = []
+    with multiprocessing.Pool(processes=workers) as pool:
+        for result in pool.imap_unordered(play_match, matches, chunksize=1):
+            print(f"Match {result['match']} ({result['mode']}, seed {result['seed']}): "
+                  f"winner {result['winner'] or 'none'} after {result['ticks']} ticks ({result['elapsed']:.1f}s)")
+            results.append(result)
+    results.sort(key=lambda r: r['match'])
+    return results
+
+
+def summarize(results):
+    wins = {}
+    for result in results:
+        key = result['winner_ai_mode'] or 'draw'
+        wins[key] = wins.get(key, 0) + 1
+    return {
+        'matches': len(results),
+        'wins_by_ai_mode': wins,
+        'average_ticks': sum(r['ticks'] for r in results) / len(results) if results else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run headless AI-vs-AI matches in parallel and collect the results.")
+    parser.add_argument("-n", "--matches", type=int, default=8, help="Number of matches to play (default=8).")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes (default: all cores).")
+    parser.add_argument(
+        "--mode",
+        nargs="+",
+        choices=["Utopia", "Gold Rush"],
+        default=["Utopia"],
+        help="Game mode(s), cycled over the matches (default=Utopia)."
+    )
+    parser.add_argument(
+        "--map-size",
+        type=int,
+        nargs=2,
+        default=[120, 120],
+        metavar=("WIDTH", "HEIGHT"),
+        help="Map size (default=120 120)."
+    )
+    parser.add_argument(
+        "--civilizations",
+        nargs="+",
+        choices=["Means", "Leans", "Marines"],
+        default=["Means", "Means"],
+        help="Civilization of each player, one per player (default=Means Means)."
+    )
+    parser.add_argument(
+        "--ai-modes",
+        nargs="+",
+        choices=["aggressive", "defensive"],
+        default=["aggressive", "defensive"],
+        help="AI profiles assigned to the players in turn (default=aggressive defensive)."
+    )
+    parser.add_argument(
+        "--rotate-profiles",
+        action="store_true",
+        default=False,
+        help="Shift the AI profiles by one seat on each match."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first match; match i uses seed + i (default=0).")
+    parser.add_argument("--ticks", type=int, default=None, help="Maximum number of ticks per match (default: until victory).")
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default="../assets/annex/tournament_results.json",
+        help="Results file (default=../assets/annex/tournament_results.json)."
+    )
+    args = parser.parse_args()
+
+    matches = build_matches(
+        args.matches, args.mode, args.map_size, args.civilizations,
+        args.ai_modes, args.seed, args.ticks, args.rotate_profiles
+    )
+    workers = args.workers or os.cpu_count()
+    print(f"Running {len(matches)} matches on {workers} workers...")
+
+    start = time.perf_counter()
+    results = run_tournament(matches, workers)
+    summary = summarize(results)
+    summary['elapsed'] = time.perf_counter() - start
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump({'summary': summary, 'results': results}, file, indent=2)
+
+    print(f"Wins by AI mode: {summary['wins_by_ai_mode']}")
+    print(f"Results written to {args.output} ({summary['elapsed']:.1f}s)")
@@ -1,125 +1,319 @@
+import heapq
+import itertools
 import random
 import math
 import curses
 
+import numpy as np
+
 from backend.Starter_File import GameMode
 
 class Map:
-    def __init__(self, width, height):
+    RESOURCE_TYPES = [None, "Wood", "Gold", "Food"]  # Codes of the resource_type layer
+
+    def __init__(self, width, height, game_mode=None, seed=None, cache=None):
         self.width = width
         self.height = height
-        self.grid = [[Tile(x, y) for x in range(width)] for y in range(height)] # THis is for N*M maps to work
-        self.resources = {"Gold": [], "Wood": []}
+        self.game_mode = game_mode if game_mode is not None else GameMode  # "Utopia" or "Gold Rush"
+        self.resources = {"Gold": ResourceIndex(self), "Wood": ResourceIndex(self)}  # Harvestable tiles, by type
+        self.init_layers()
         self.pre_post_entities = {"pre": {"Construct" : []}, "post": {}}
         self.buildings = []
         self.rubbles = []
-        self.generate_map()
-
-    def generate_map(self):
+        self.scheduler = None  # TickScheduler of the running game, set by GameEngine
+        self.cache = cache  # MapCache the resources and starting buildings are read from / written to
+        self.path_cache = None  # PathCache of the running game, set by GameEngine
+        self.regions = None  # ConnectedRegions of the running game, set by GameEngine
+        self.pathfinder = None  # Pathfinder used instead of the grid A* (HPA*, JPS), selected in config.pathfinder
+        self.flow_fields = None  # FlowFieldCache of the running game, set by GameEngine
+        self.path_repairs = None  # PathRepairs (D* Lite) of the running game, set by GameEngine
+        self.path_queue = None  # PathQueue spreading the searches over the ticks, set by GameEngine
+        self.reservations = None  # ReservationTable of the moving units, set by GameEngine
+        self.routes = None  # RouteTable of the villagers' trips to the drop points, set by GameEngine
+        self.walkability_listeners = []  # Pathfinding structures told about every walkability change
+        self.generate_map(seed)
+
+    def init_layers(self):
+        # The map is stored as typed layers indexed [y, x]; grid[y][x] builds Tile views on demand
+        shape = (self.height, self.width)
+        # Walkability bitmap with a one tile blocked border: walkable[(y + 1) * stride + x + 1]
+        # is the only check pathfinding needs, even for neighbours just outside the map
+        self.stride = self.width + 2
+        self.walkable = bytearray((self.height + 2) * self.stride)
+        self.bind_passable()
+        self.passable[:, :] = True  # No resource and no blocking building
+        self.resource_type = np.zeros(shape, dtype=np.int8)
+        self.resource_amount = np.zeros(shape, dtype=np.float64)
+        self.resource_variant = np.zeros(shape, dtype=np.int8)
+        self.building_id = np.full(shape, -1, dtype=np.int32)
+        self.unit_count = np.zeros(shape, dtype=np.int16)
+        self.building_refs = {}  # building id -> building
+        self.building_ids = {}  # building -> building id
+        self.next_building_id = 0
+        self.tile_units = {}  # (x, y) -> units on the tile (only non empty tiles)
+        self.tile_rubble = {}  # (x, y) -> Rubble
+        self.spatial_hash = SpatialHash()  # Units and buildings by cell, for the radius queries of the AI
+        self.blocked_table = None  # SummedAreaTable of the tiles no building can cover, None until read after a change
+        self.grid = Grid(self)
+
+    def bind_passable(self):
+        # passable is a [y, x] view on the inside of walkable: both always hold the same data
+        padded = np.frombuffer(self.walkable, dtype=bool).reshape(self.height + 2, self.stride)
+        self.passable = padded[1:-1, 1:-1]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('passable', None)  # Rebuilt from walkable, a pickled copy would no longer share it
+        # Pathfinding structures are rebuilt by GameEngine.load_game
+        state['path_cache'] = None
+        state['regions'] = None
+        state['pathfinder'] = None
+        state['flow_fields'] = None
+        state['path_repairs'] = None
+        state['path_queue'] = None
+        state['reservations'] = None
+        state['routes'] = None
+        state['walkability_listeners'] = []
+        state['blocked_table'] = None  # Rebuilt on the first placement check
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.path_cache = state.get('path_cache')
+        self.regions = state.get('regions')
+        self.pathfinder = state.get('pathfinder')
+        self.flow_fields = state.get('flow_fields')
+        self.path_repairs = state.get('path_repairs')
+        self.path_queue = state.get('path_queue')
+        self.reservations = state.get('reservations')
+        self.routes = state.get('routes')
+        self.walkability_listeners = state.get('walkability_listeners', [])
+        self.blocked_table = None
+        legacy_resources = {resource_type: tiles for resource_type, tiles in self.resources.items() if isinstance(tiles, list)}
+        for resource_type in legacy_resources:
+            self.resources[resource_type] = ResourceIndex(self)  # Filled once the walkability is restored
+        if isinstance(self.grid, list):
+            # Saves made before the layers stored one Tile object per cell
+            legacy_grid = self.grid
+            self.init_layers()
+            for y, row in enumerate(legacy_grid):
+                for x, legacy_tile in enumerate(row):
+                    self.set_resource(x, y, legacy_tile.__dict__.get('resource'))
+                    if legacy_tile.__dict__.get('building') is not None:
+                        self.set_building(x, y, legacy_tile.__dict__['building'])
+                    for unit in legacy_tile.__dict__.get('unit', []):
+                        self.place_unit(x, y, unit)
+                    if legacy_tile.__dict__.get('rubble') is not None:
+                        self.tile_rubble[(x, y)] = legacy_tile.__dict__['rubble']
+        elif 'walkable' not in state:
+            # Saves made before the walkability bitmap
+            passable = self.passable
+            self.stride = self.width + 2
+            self.walkable = bytearray((self.height + 2) * self.stride)
+            self.bind_passable()
+            self.passable[:, :] = passable
+        else:
+            self.bind_passable()
+        if 'spatial_hash' not in state:
+            # Saves made before the spatial hash: the buildings are not restored yet, GameEngine.load_game
+            # fills it with index_entities once pickle is done
+            self.spatial_hash = None
+        for resource_type, tiles in legacy_resources.items():
+            # Saves made before the resource index
+            self.resources[resource_type] = ResourceIndex(self, tiles)
+
+    def index_entities(self):
+        """Reconstruit le spatial hash à partir des unités et des bâtiments de la carte (parties sauvegardées avant lui)"""
+        self.spatial_hash = SpatialHash()
+        for (x, y), units in self.tile_units.items():
+            for unit in units:
+                self.spatial_hash.add(unit, x, y)
+        for building in self.building_refs.values():
+            self.spatial_hash.add(building, int(building.position[0]), int(building.position[1]))
+
+    def get_building(self, x, y):
+        building_id = self.building_id[y, x]
+        return self.building_refs[building_id] if building_id >= 0 else None
+
+    def set_building(self, x, y, building):
+        if building is None:
+            self.building_id[y, x] = -1
+            self.set_walkable(x, y, self.resource_type[y, x] == 0)
+            return
+        building_id = self.building_ids.get(building)
+        if building_id is None:
+            building_id = self.next_building_id
+            self.next_building_id += 1
+            self.building_ids[building] = building_id
+            self.building_refs[building_id] = building
+        self.building_id[y, x] = building_id
+        self.set_walkable(x, y, self.resource_type[y, x] == 0 and building.is_walkable())
+
+    def set_walkable(self, x, y, walkable):
+        index = (y + 1) * self.stride + x + 1
+        walkable = 1 if walkable else 0
+        if self.walkable[index] != walkable:
+            self.walkable[index] = walkable
+            self.blocked_table = None
+            for resource_index in self.resources.values():
+                resource_index.tile_changed(x, y)
+            for listener in self.walkability_listeners:
+                listener.tile_changed(x, y, walkable)
+
+    def forget_building(self, building):
+        building_id = self.building_ids.pop(building, None)
+        if building_id is not None:
+            del self.building_refs[building_id]
+
+    def get_resource(self, x, y):
+        return ResourceView(self, x, y) if self.resource_type[y, x] else None
+
+    def set_resource(self, x, y, resource):
+        if resource is None:
+            self.resource_type[y, x] = 0
+            self.resource_amount[y, x] = 0
+            building = self.get_building(x, y)
+            self.set_walkable(x, y, building is None or building.is_walkable())
+        else:
+            self.resource_type[y, x] = self.RESOURCE_TYPES.index(resource.type)
+            self.resource_amount[y, x] = resource.amount
+            self.resource_variant[y, x] = getattr(resource, 'variant', 0)
+            self.set_walkable(x, y, False)
+
+    def deplete_resource(self, x, y):
+        """Retire une ressource épuisée de la carte et rend la case praticable"""
+        resource_type = self.RESOURCE_TYPES[self.resource_type[y, x]]
+        self.set_resource(x, y, None)
+        if resource_type in self.resources:
+            self.resources[resource_type].remove((x, y))
+
+    def generate_map(self, seed=None):
         
-        self.generate_resources()
+        self.generate_resources(seed)
+
+    def generate_resources(self, seed=None):
+        """
+        Génère l'or et les forêts en bloc avec NumPy puis remplit les couches de la carte.
+
+        :param seed: Graine du générateur ; même taille, même mode et même graine donnent la même carte.
+                     Sans graine, elle est tirée du module random (donc reproductible si random est initialisé).
+        """
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+
+        if self.cache is not None:
+            layers = self.cache.load_layers(self.width, self.height, self.game_mode, seed)
+            if layers is not None:
+                self.apply_resource_layers(*layers)
+                return
 
-    def generate_resources(self):
-        
         num_resources = int(self.width * self.height * 0.03)  # 3% of the map as resource tiles
 
         # Gold Generation
         num_gold = int(num_resources * 0.3)  # 30% of resource tiles as gold
+        gold_x, gold_y = self.sample_gold(rng, num_gold)
 
-        # Check if gamemode is a starter_file and then adjust gold generation based on the mode
-        if GameMode == "Utopia":
-            # Utopia: Gold is randomly placed
-            for _ in range(num_gold):
-                x = random.randint(0, self.width - 1)
-                y = random.randint(0, self.height - 1)
-                tile = self.grid[y][x]
-
-                if tile.resource is None:  # Ensure no other resources overwrite the tile
-                    resource = Gold()
-                    tile.resource = resource
-                    self.resources["Gold"].append((x, y))  # Store the position of Gold resources
-        
-
-        elif GameMode == "Gold Rush":
-            # Gold Rush: All gold resources are concentrated in a smaller circle within a larger circle
+        # Wood Generation
+        num_wood = (num_resources - num_gold) // 10  # Remaining resource tiles as wood --> increase the '15' for less forests
+        wood_x, wood_y = self.sample_forests(rng, num_wood)
+
+        # Gold is placed first, forests never overwrite it
+        layer = np.zeros((self.height, self.width), dtype=np.int8)
+        wood_code = self.RESOURCE_TYPES.index("Wood")
+        gold_code = self.RESOURCE_TYPES.index("Gold")
+        layer[wood_y, wood_x] = wood_code
+        layer[gold_y, gold_x] = gold_code
+        variant = np.where(layer == wood_code, rng.integers(0, 3, size=layer.shape), 0)  # Tree variant
+
+        self.apply_resource_layers(layer, variant)
+        if self.cache is not None:
+            self.cache.store_layers(self.width, self.height, self.game_mode, seed, layer, variant)
+
+    def apply_resource_layers(self, layer, variant):
+        # Fill the map layers and self.resources from generated (or cached) resource codes
+        wood_code = self.RESOURCE_TYPES.index("Wood")
+        gold_code = self.RESOURCE_TYPES.index("Gold")
+        self.resource_type[:, :] = layer
+        self.resource_amount[:, :] = 0
+        self.resource_amount[layer == gold_code] = Gold.AMOUNT
+        self.resource_amount[layer == wood_code] = Wood.AMOUNT
+        self.resource_variant[:, :] = variant
+        self.passable[:, :] = layer == 0
+        self.blocked_table = None
+        for listener in self.walkability_listeners:
+            listener.reset()
+
+        for resource_type, code in (("Gold", gold_code), ("Wood", wood_code)):
+            ys, xs = np.nonzero(layer == code)
+            self.resources[resource_type] = ResourceIndex(self, zip(xs.tolist(), ys.tolist()))  # Store the positions of the resources
+
+    def sample_gold(self, rng, num_gold):
+        if self.game_mode == "Gold Rush":
+            # Gold Rush: All gold resources are concentrated in a circle at the center of the map
             center_x = self.width // 2
             center_y = self.height // 2
+            radius = min(self.width, self.height) // 10
 
-            # Define a larger radius and a smaller radius for gold placement
-            large_radius = min(self.width, self.height) // 10
-            small_radius = large_radius // 1  # Smaller radius for denser gold placement
-
-            for _ in range(num_gold):
-                # Generate coordinates within the smaller circle inside the larger circle
-                while True:
-                    angle = random.uniform(0, 2 * math.pi)
-                    distance = random.uniform(0, small_radius)
-                    x = int(center_x + distance * math.cos(angle))
-                    y = int(center_y + distance * math.sin(angle))
+            angles = rng.uniform(0, 2 * math.pi, num_gold)
+            distances = rng.uniform(0, radius, num_gold)
+            x = (center_x + distances * np.cos(angles)).astype(np.int64)
+            y = (center_y + distances * np.sin(angles)).astype(np.int64)
+        else:
+            # Utopia: Gold is randomly placed
+            x = rng.integers(0, self.width, num_gold)
+            y = rng.integers(0, self.height, num_gold)
+        return np.clip(x, 0, self.width - 1), np.clip(y, 0, self.height - 1)
 
-                    # Ensure the coordinates are within the grid bounds and within the larger circle
-                    if (x - center_x) ** 2 + (y - center_y) ** 2 <= large_radius ** 2:
-                        x = max(0, min(x, self.width - 1))
-                        y = max(0, min(y, self.height - 1))
-                        tile = self.grid[y][x]
+    def sample_forests(self, rng, num_wood):
+        # Irregular forests: one random walk of 20 to 50 steps per forest, all forests advancing together
+        max_size = 50
+        forest_sizes = rng.integers(20, max_size + 1, num_wood)
+        x = rng.integers(0, self.width, num_wood)
+        y = rng.integers(0, self.height, num_wood)
 
-                        if tile.resource is None:  # Ensure no other resources overwrite the tile
-                            resource = Gold()
-                            tile.resource = resource
-                            self.resources["Gold"].append((x, y))  # Store the position of Gold resources
-                        break  # Exit the loop once a valid position is found
+        directions = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)])
+        steps = directions[rng.integers(0, 4, (max_size, num_wood))]
 
+        xs = np.empty((max_size, num_wood), dtype=np.int64)
+        ys = np.empty((max_size, num_wood), dtype=np.int64)
+        for i in range(max_size):
+            # Ensure the forest fits within the grid boundaries
+            x = np.clip(x + steps[i, :, 0], 0, self.width - 1)
+            y = np.clip(y + steps[i, :, 1], 0, self.height - 1)
+            xs[i] = x
+            ys[i] = y
 
-        # Wood Generation
-        num_wood = (num_resources - num_gold) // 10  # Remaining resource tiles as wood --> increase the '15' for less forests
-        for _ in range(num_wood):
-            # Generate a random forest
-            forest_size = random.randint(20, 50)
-            start_x = random.randint(0, self.width - 1)
-            start_y = random.randint(0, self.height - 1)
-
-            # Create an irregular forest by deciding tile placement randomly
-            x, y = start_x, start_y
-            tile = self.grid[y][x]
-            directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-            for _ in range(forest_size):
-                # Choose a random direction
-                dx, dy = random.choice(directions)
-                x += dx
-                y += dy
-
-                # Ensure the forest fits within the grid boundaries
-                x = max(0, min(x, self.width - 1))
-                y = max(0, min(y, self.height - 1))
-                tile = self.grid[y][x]
-
-                if tile.resource is None:  # Avoid overwriting existing resources
-                    resource = Wood()
-                    tile.resource = resource
-                    self.resources["Wood"].append((x, y))  # Store Wood resource position
+        in_forest = np.arange(max_size)[:, None] < forest_sizes[None, :]
+        return xs[in_forest], ys[in_forest]
 
 
     def is_tile_free(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
-            tile = self.grid[y][x]
-            is_free = tile.resource is None and (tile.building is None or tile.building.is_walkable() == True) and tile.unit == []
-            return is_free
+            return self.walkable[(y + 1) * self.stride + x + 1] == 1 and self.unit_count[y, x] == 0
         return False
     
     def is_tile_free_for_unit(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
-            tile = self.grid[y][x]
-            is_free = tile.resource is None and (tile.building is None or tile.building.is_walkable() == True)
-            return is_free
+            return self.walkable[(y + 1) * self.stride + x + 1] == 1
         return False
     
+    def blocked_areas(self):
+        """
+        :return: SummedAreaTable des cases non praticables (ressources, bâtiments), recalculée à la
+                 première lecture après un changement de praticabilité
+        """
+        if self.blocked_table is None:
+            self.blocked_table = SummedAreaTable(~self.passable)
+        return self.blocked_table
+
     def is_area_free(self, x, y, size):
-        for i in range(size):
-            for j in range(size):
-                if not self.is_tile_free(x + i, y + j):
-                    return False
-        return True
+        if x < 0 or y < 0 or x + size > self.width or y + size > self.height:
+            return False
+        if self.blocked_areas().area(x, y, x + size, y + size):
+            return False
+        return not self.unit_count[y:y + size, x:x + size].any()
 
     def place_building(self, x, y, building):
         if self.is_area_free(x, y, building.size):
@@ -127,34 +321,38 @@ class Map:
             building.y = y
             for i in range(building.size):
                 for j in range(building.size):
-                    self.grid[y + j][x + i].building = building
-                    if self.grid[y + j][x + i].rubble:
-                        self.grid[y + j][x + i].rubble = None
-                        if self.grid[y + j][x + i].rubble in self.rubbles:
-                            self.rubbles.remove(self.grid[y + j][x + i].rubble)
-                        
+                    self.set_building(x + i, y + j, building)
+                    self.tile_rubble.pop((x + i, y + j), None)
+            self.spatial_hash.add(building, x, y)
 
     def remove_building(self, x, y, building):
         for i in range(building.size):
             for j in range(building.size):
-                self.grid[y + j][x + i].building = None
+                self.set_building(x + i, y + j, None)
                 if building.name == "Construct":
                     continue
                 if building.is_attacked == True:
                     rubble = Rubble(size=building.size, position=(x + i, y + j))
-                    self.grid[y + j][x + i].rubble = rubble
+                    self.tile_rubble[(x + i, y + j)] = rubble
                     if i == 0 and j == 0:
                         self.rubbles.append(rubble)
+        self.forget_building(building)
+        self.spatial_hash.remove(building)
     
     def place_unit(self, x, y, unit):
         if 0 <= x < self.width and 0 <= y < self.height:
-            tile = self.grid[y][x]
-            tile.unit.append(unit)  # Place the unit on the tile
+            self.tile_units.setdefault((x, y), []).append(unit)  # Place the unit on the tile
+            self.unit_count[y, x] += 1
+            self.spatial_hash.add(unit, x, y)
 
     def remove_unit(self, x, y, unit):
-        tile = self.grid[y][x]
-        if tile.unit is not None and unit in tile.unit:
-            tile.unit.remove(unit)  # Remove the unit from the tile
+        units = self.tile_units.get((x, y))
+        if units is not None and unit in units:
+            units.remove(unit)  # Remove the unit from the tile
+            self.unit_count[y, x] -= 1
+            if not units:
+                del self.tile_units[(x, y)]
+            self.spatial_hash.remove(unit)
         else:
             print(f"Terrain File : No unit on tile ({x}, {y})")
 
@@ -240,29 +438,19 @@ class Map:
         nearest_resource = None
 
         if resource_type in ("Wood", "Gold"):
-            # Iterate through each resource position for the specified type
-            for resource_x, resource_y in self.resources[resource_type]:
-                distance = abs(start_position[0] - resource_x) + abs(start_position[1] - resource_y)
-
-                adjacent_tiles = []
-                for x in range(-1, 2):
-                    for y in range(-1, 2):
-                        if x == 0 and y == 0:
-                            continue
-                        adjacent_tiles.append((resource_x + x, resource_y + y))
-
-                if distance < min_distance and any(self.is_tile_free_for_unit(x, y) for x, y in adjacent_tiles):
-                    min_distance = distance
-                    nearest_resource = (resource_x, resource_y)
+            # Nearest tile with a free neighbour, from the cells around the start outwards
+            nearest = self.resources[resource_type].nearest(start_position)
+            if nearest:
+                nearest_resource = nearest[0]
 
         elif resource_type == "Food":
-            # Iterate through each building position for the specified type
-            for building in player.buildings:
-                if building.name == "Farm" and building.is_farmed == False:
-                    distance = abs(start_position[0] - building.position[0]) + abs(start_position[1] - building.position[1])
-                    if distance < min_distance:
-                        min_distance = distance
-                        nearest_resource = building.position
+            # Only the farms nobody gathers from, ties going to the one built first
+            for building, order in player.free_farms.items():
+                distance = abs(start_position[0] - building.position[0]) + abs(start_position[1] - building.position[1])
+                if distance < min_distance or (distance == min_distance and order < min_order):
+                    min_distance = distance
+                    min_order = order
+                    nearest_resource = building.position
         else:
             #print(f"Invalid resource type: {resource_type}")
             pass
@@ -274,27 +462,96 @@ class Map:
     def find_drop_point(self, start_position, player):
         min_distance = float('inf')
         nearest_drop_point = None
-        # Iterate through each building owned by the player
-        for building in player.buildings:
-            if building.name in ["Town Center", "Camp"]:  # Check if the building is a valid drop-off point
-                distance = abs(start_position[0] - building.position[0]) + abs(start_position[1] - building.position[1])
-                if distance < min_distance:
-                    min_distance = distance
-                    nearest_drop_point = building.position
+        # Only the player's Town Centers and Camps, in the order they were built
+        for building in player.drop_points:
+            distance = abs(start_position[0] - building.position[0]) + abs(start_position[1] - building.position[1])
+            if distance < min_distance:
+                min_distance = distance
+                nearest_drop_point = building.position
 
         if nearest_drop_point is None:
             #print("No available drop-off points found.")
             pass
         return nearest_drop_point    
 
+class Grid:
+    """Vue grid[y][x] sur les couches de la carte, pour le code qui manipule des Tile"""
+    def __init__(self, game_map):
+        self.map = game_map
+
+    def __len__(self):
+        return self.map.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.map.height
+        if not 0 <= y < self.map.height:
+            raise IndexError("grid row out of range")
+        return GridRow(self.map, y)
+
+    def __iter__(self):
+        for y in range(self.map.height):
+            yield GridRow(self.map, y)
+
+
+class GridRow:
+    def __init__(self, game_map, y):
+        self.map = game_map
+        self.y = y
+
+    def __len__(self):
+        return self.map.width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.map.width
+        if not 0 <= x < self.map.width:
+            raise IndexError("grid column out of range")
+        return Tile(self.map, x, self.y)
+
+    def __iter__(self):
+        for x in range(self.map.width):
+            yield Tile(self.map, x, self.y)
+
+
 class Tile:
-    def __init__(self, x, y):
+    """Vue à la demande d'une case de la carte : les données vivent dans les couches de Map"""
+    def __init__(self, game_map, x, y):
+        self.map = game_map
         self.x = x
         self.y = y
-        self.resource = None
-        self.building = None
-        self.unit = []
-        self.rubble = None
+
+    @property
+    def resource(self):
+        return self.map.get_resource(self.x, self.y)
+
+    @resource.setter
+    def resource(self, resource):
+        self.map.set_resource(self.x, self.y, resource)
+
+    @property
+    def building(self):
+        return self.map.get_building(self.x, self.y)
+
+    @building.setter
+    def building(self, building):
+        self.map.set_building(self.x, self.y, building)
+
+    @property
+    def unit(self):
+        # Read only: units are added and removed through Map.place_unit / Map.remove_unit
+        return self.map.tile_units.get((self.x, self.y), [])
+
+    @property
+    def rubble(self):
+        return self.map.tile_rubble.get((self.x, self.y))
+
+    @rubble.setter
+    def rubble(self, rubble):
+        if rubble is None:
+            self.map.tile_rubble.pop((self.x, self.y), None)
+        else:
+            self.map.tile_rubble[(self.x, self.y)] = rubble
 
     def __str__(self):
         if self.unit:
@@ -310,6 +567,276 @@ class Tile:
             return "." 
 
 
+# Summed Area Table Class
+class SummedAreaTable:
+    """
+    Table de sommes cumulées (image intégrale) d'une couche [y, x] : la somme de n'importe quel
+    rectangle se lit en quatre valeurs, quelle que soit sa taille.
+    """
+    def __init__(self, layer):
+        height, width = layer.shape
+        self.sums = np.zeros((height + 1, width + 1), dtype=np.int32)
+        np.cumsum(np.cumsum(layer, axis=0, dtype=np.int32), axis=1, out=self.sums[1:, 1:])
+
+    def area(self, x0, y0, x1, y1):
+        """
+        Somme des cases x0 <= x < x1, y0 <= y < y1. Les bornes peuvent être des tableaux NumPy : une
+        somme par rectangle, calculées d'un coup.
+        """
+        sums = self.sums
+        return sums[y1, x1] - sums[y0, x1] - sums[y1, x0] + sums[y0, x0]
+
+
+# Spatial Hash Class
+class SpatialHash:
+    """
+    Index des unités et des bâtiments par cellule de cell_size x cell_size cases, tenu à jour par
+    Map.place_unit / remove_unit / move_unit et place_building / remove_building. Une recherche
+    dans un rayon ne parcourt que les cellules qui le couvrent.
+    """
+    def __init__(self, cell_size=8):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell x, cell y) -> {entity: None}, in insertion order
+        self.entity_cells = {}  # entity -> its cell
+
+    def add(self, entity, x, y):
+        cell = (x // self.cell_size, y // self.cell_size)
+        old_cell = self.entity_cells.get(entity)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            self.remove(entity)
+        self.cells.setdefault(cell, {})[entity] = None
+        self.entity_cells[entity] = cell
+
+    def remove(self, entity):
+        cell = self.entity_cells.pop(entity, None)
+        if cell is None:
+            return
+        entities = self.cells[cell]
+        del entities[entity]
+        if not entities:
+            del self.cells[cell]
+
+    def query(self, position, radius):
+        """
+        :return: Unités et bâtiments dont la position est à au plus radius de position, du plus proche au plus éloigné
+        """
+        px, py = position
+        size = self.cell_size
+        # A unit stands anywhere inside the tile it is indexed at: one tile of margin
+        min_cx, max_cx = int((px - radius - 1) // size), int((px + radius + 1) // size)
+        min_cy, max_cy = int((py - radius - 1) // size), int((py + radius + 1) // size)
+        found = []
+        cells = self.cells
+        for cy in range(min_cy, max_cy + 1):
+            for cx in range(min_cx, max_cx + 1):
+                entities = cells.get((cx, cy))
+                if entities is None:
+                    continue
+                for entity in entities:
+                    ex, ey = entity.position
+                    distance = ((px - ex) ** 2 + (py - ey) ** 2) ** 0.5
+                    if distance <= radius:
+                        found.append((distance, entity))
+        found.sort(key=lambda item: item[0])
+        return [entity for _, entity in found]
+
+    def nearest(self, positions, radius, accept):
+        """
+        Plus proche entité dans un rayon autour de chaque position, en une passe : les positions sont
+        regroupées par cellule, et les distances d'un groupe aux candidats des cellules qui l'entourent
+        sont calculées d'un bloc avec NumPy.
+
+        :param accept: Filtre des entités candidates (par exemple celles des autres joueurs)
+        :return: Liste alignée sur positions, None là où aucune entité acceptée n'est dans le rayon
+        """
+        size = self.cell_size
+        results = [None] * len(positions)
+        groups = {}
+        for i, (px, py) in enumerate(positions):
+            groups.setdefault((int(px // size), int(py // size)), []).append(i)
+
+        cells = self.cells
+        for (cell_x, cell_y), indexes in groups.items():
+            # Cells within reach of any point of this cell, in the same order as query()
+            min_cx, max_cx = int((cell_x * size - radius - 1) // size), int(((cell_x + 1) * size + radius + 1) // size)
+            min_cy, max_cy = int((cell_y * size - radius - 1) // size), int(((cell_y + 1) * size + radius + 1) // size)
+            candidates = [
+                entity
+                for cy in range(min_cy, max_cy + 1)
+                for cx in range(min_cx, max_cx + 1)
+                for entity in cells.get((cx, cy), ())
+                if accept(entity)
+            ]
+            if not candidates:
+                continue
+            points = np.array([entity.position for entity in candidates], dtype=np.float64)
+            queries = np.array([positions[i] for i in indexes], dtype=np.float64)
+            dx = queries[:, 0:1] - points[:, 0]
+            dy = queries[:, 1:2] - points[:, 1]
+            squared = dx * dx + dy * dy
+            squared[squared > radius * radius] = np.inf
+            best = squared.argmin(axis=1)  # First of the nearest, as min() over query()
+            for row, i in enumerate(indexes):
+                if squared[row, best[row]] != np.inf:
+                    results[i] = candidates[best[row]]
+        return results
+
+
+# Resource Index Class
+class ResourceIndex:
+    """
+    Cases d'un type de ressource rangées par cellules de cell_size x cell_size cases. Les cases
+    récoltables (avec une case voisine praticable) sont aussi rangées à part, tenues à jour par
+    Map.set_walkable : la recherche des plus proches ne voit pas l'intérieur des forêts et des
+    filons. Elle part de la cellule de départ et s'arrête dès que les cellules suivantes ne peuvent
+    plus rien contenir de plus proche ; une ressource épuisée est retirée en O(1).
+    """
+    def __init__(self, game_map, tiles=(), cell_size=16):
+        self.map = game_map
+        self.cell_size = cell_size
+        self.tiles = set()
+        self.harvestable = {}  # (cell x, cell y) -> tiles of the cell with a free neighbour
+        self.bounds = None  # (min cell x, min cell y, max cell x, max cell y) of the harvestable cells, None to recompute
+        for tile in tiles:
+            self.add(tile)
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __contains__(self, tile):
+        return tile in self.tiles
+
+    def __iter__(self):
+        return iter(self.tiles)
+
+    def add(self, tile):
+        self.tiles.add(tile)
+        self.update(tile)
+
+    def remove(self, tile):
+        if tile in self.tiles:
+            self.tiles.remove(tile)
+            self.set_harvestable(tile, False)
+
+    def update(self, tile):
+        walkable = self.map.walkable
+        stride = self.map.stride
+        index = (tile[1] + 1) * stride + tile[0] + 1
+        # The padded border keeps the 8 neighbours in range
+        self.set_harvestable(tile, any(walkable[index + dy * stride + dx] for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy))
+
+    def set_harvestable(self, tile, harvestable):
+        cell = (tile[0] // self.cell_size, tile[1] // self.cell_size)
+        if harvestable:
+            if cell not in self.harvestable:
+                self.harvestable[cell] = set()
+                self.bounds = None
+            self.harvestable[cell].add(tile)
+        else:
+            tiles = self.harvestable.get(cell)
+            if tiles is not None:
+                tiles.discard(tile)
+                if not tiles:
+                    del self.harvestable[cell]
+                    self.bounds = None
+
+    def tile_changed(self, x, y):
+        # Only the resources around the tile can gain or lose their free neighbour
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if (dx or dy) and (x + dx, y + dy) in self.tiles:
+                    self.update((x + dx, y + dy))
+
+    def nearest(self, position, k=1):
+        """
+        :return: Les k cases récoltables les plus proches de position (distance de Manhattan), de la plus
+                 proche à la plus éloignée ; à distance égale, dans l'ordre des lignes de la carte
+        """
+        harvestable = self.harvestable
+        if not harvestable:
+            return []
+        if self.bounds is None:
+            self.bounds = (
+                min(cx for cx, _ in harvestable), min(cy for _, cy in harvestable),
+                max(cx for cx, _ in harvestable), max(cy for _, cy in harvestable)
+            )
+        sx, sy = position
+        size = self.cell_size
+        start_cx, start_cy = int(sx // size), int(sy // size)
+        # Offsets of the harvestable cells' bounding box from the start cell: rings are clipped to it
+        low_x, low_y = self.bounds[0] - start_cx, self.bounds[1] - start_cy
+        high_x, high_y = self.bounds[2] - start_cx, self.bounds[3] - start_cy
+        first_ring = max(low_x, low_y, -high_x, -high_y, 0)
+        last_ring = max(-low_x, -low_y, high_x, high_y)
+        found = []  # (distance, y, x)
+        for ring in range(first_ring, last_ring + 1):
+            # Every tile of this ring is more than (ring - 1) * size away
+            if len(found) >= k and found[k - 1][0] <= (ring - 1) * size:
+                break
+            ring_cells = [
+                (start_cx + dx, start_cy + dy)
+                for dy in ((-ring, ring) if ring else (0,)) if low_y <= dy <= high_y
+                for dx in range(max(-ring, low_x), min(ring, high_x) + 1)
+            ]
+            ring_cells += [
+                (start_cx + dx, start_cy + dy)
+                for dx in (-ring, ring) if ring and low_x <= dx <= high_x
+                for dy in range(max(-ring + 1, low_y), min(ring - 1, high_y) + 1)
+            ]
+            # Nearest cells first, each skipped once it cannot hold anything nearer than the k found
+            candidates = []
+            for cx, cy in ring_cells:
+                tiles = harvestable.get((cx, cy))
+                if tiles is not None:
+                    dx = max(cx * size - sx, 0, sx - (cx * size + size - 1))
+                    dy = max(cy * size - sy, 0, sy - (cy * size + size - 1))
+                    candidates.append((dx + dy, cx, cy, tiles))
+            candidates.sort(key=lambda candidate: candidate[0])
+            for lower_bound, _, _, tiles in candidates:
+                if len(found) >= k and lower_bound > found[k - 1][0]:
+                    break
+                found = heapq.nsmallest(k, itertools.chain(found, ((abs(sx - x) + abs(sy - y), y, x) for x, y in tiles)))
+        return [(x, y) for _, y, x in found]
+
+
+# Resource View Class
+class ResourceView:
+    """Ressource d'une case, lue et écrite directement dans les couches resource_type / resource_amount"""
+    SYMBOLS = {"Wood": "W", "Gold": "G", "Food": "F"}
+
+    def __init__(self, game_map, x, y):
+        self.map = game_map
+        self.x = x
+        self.y = y
+
+    @property
+    def type(self):
+        return Map.RESOURCE_TYPES[self.map.resource_type[self.y, self.x]]
+
+    @property
+    def symbol(self):
+        return self.SYMBOLS.get(self.type, "R")
+
+    @property
+    def variant(self):
+        return int(self.map.resource_variant[self.y, self.x])
+
+    @property
+    def amount(self):
+        return float(self.map.resource_amount[self.y, self.x])
+
+    @amount.setter
+    def amount(self, amount):
+        self.map.resource_amount[self.y, self.x] = amount
+
+    def gather(self, amount):
+        gathered = min(self.amount, amount)
+        self.amount -= gathered
+        return gathered
+
+
 # Resource Class
 class Resource:
     def __init__(self, resource_type, amount, symbol="R"):
@@ -325,9 +852,11 @@ class Resource:
 
 # Wood Resource Class
 class Wood(Resource):
+    AMOUNT = 100
+
     def __init__(self):
         self.variant = random.randint(0, 2)  # Randomly select tree variant
-        super().__init__(resource_type="Wood", amount=100, symbol="W")
+        super().__init__(resource_type="Wood", amount=self.AMOUNT, symbol="W")
 
 
 # Food Resource Class
@@ -337,8 +866,10 @@ class Food(Resource):
 
 # Gold Resource Class
 class Gold(Resource):
+    AMOUNT = 800  # 800 per tile
+
     def __init__(self):
-        super().__init__(resource_type="Gold", amount=800, symbol="G")  # 800 per tile
+        super().__init__(resource_type="Gold", amount=self.AMOUNT, symbol="G")
 
 
 # Rubble Class
@@ -0,0 +1,9 @@
+# Tests run from the repository root: the game imports its modules from backend/ by bare name
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'backend'), ROOT]
+os.environ.setdefault('TEMP', tempfile.gettempdir())  # logger.py writes its log there
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
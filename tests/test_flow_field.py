@@ -0,0 +1,29 @@
+from backend.Starter_File import players  # Loads the game modules in the order main.py does
+from Flow_Field import FlowField
+from frontend.Terrain import Map
+
+
+def settled_distances(field):
+    field.settle(0)  # The padding is never reached: settles the whole field
+    return list(field.distance)
+
+
+def test_blocked_tiles_are_repaired_like_a_new_field():
+    game_map = Map(30, 30, game_mode="Utopia", seed=1)
+    goals = [(14, 15), (15, 14), (16, 15), (15, 16)]
+    field = FlowField(game_map, goals)
+    field.settle((2 * game_map.stride) + 2, 300)  # Half explored, as in a game
+    for x, y in [(15, 10), (16, 10), (17, 10), (18, 10), (15, 14), (12, 20)]:
+        game_map.set_walkable(x, y, False)
+        assert field.tile_blocked((y + 1) * game_map.stride + x + 1) is not None
+    game_map.set_walkable(15, 14, True)
+    field.tile_freed(15 * game_map.stride + 16)
+    assert settled_distances(field) == settled_distances(FlowField(game_map, goals))
+
+
+def test_repair_gives_up_past_max_tiles():
+    game_map = Map(30, 30, game_mode="Utopia", seed=1)
+    field = FlowField(game_map, [(15, 15)])
+    field.settle(0)
+    game_map.set_walkable(15, 16, False)
+    assert field.tile_blocked(17 * game_map.stride + 16, max_tiles=10) is None
@@ -0,0 +1,48 @@
+from backend.Starter_File import players  # Loads the game modules in the order main.py does
+from Actions import Action
+from Players import Player
+from Scheduler import TickScheduler
+from Units import Villager
+from frontend.Terrain import Map, Gold
+
+
+def make_gatherers(game_map, amount, count):
+    # count villagers around a gold tile holding amount, all gathering it
+    game_map.set_resource(10, 10, Gold())
+    game_map.resource_amount[10, 10] = amount
+    player = Player("Test", "Means", None, 1)
+    villagers = []
+    for x, y in [(9, 10), (11, 10), (10, 9), (10, 11)][:count]:
+        villager = Villager(player, position=(x, y))
+        game_map.place_unit(x, y, villager)
+        villager.task = "gathering"
+        villager.last_gathered = "Gold"
+        villager.target_resource = (10, 10)
+        villagers.append(villager)
+    return villagers
+
+
+def test_gatherers_never_take_more_than_the_tile_holds():
+    game_map = Map(20, 20, game_mode="Utopia", seed=1)
+    game_map.set_resource(10, 10, None)
+    villagers = make_gatherers(game_map, 3, 2)
+    action = Action(game_map)
+    for villager in villagers:
+        action._gather(villager, "Gold", 0.0)
+    # Both slept long enough to fill up on a full tile
+    for villager in villagers:
+        action._gather(villager, "Gold", 5.0)
+
+    assert sum(villager.carrying["Gold"] for villager in villagers) == 3
+    assert game_map.get_resource(10, 10) is None
+
+
+def test_gatherer_wakes_when_its_tile_may_be_empty():
+    game_map = Map(20, 20, game_mode="Utopia", seed=1)
+    game_map.set_resource(10, 10, None)
+    villager, = make_gatherers(game_map, 2, 1)
+    villager.last_gather_time = 0.0
+
+    wake_time = TickScheduler().next_update_time(villager, 0.0, game_map)
+
+    assert wake_time == 2 / villager.gather_rate
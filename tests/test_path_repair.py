@@ -0,0 +1,55 @@
+import pytest
+
+from backend.Starter_File import players  # Loads the game modules in the order main.py does
+from Actions import Action
+from D_Star_Lite import PathRepairs
+from frontend.Terrain import Map
+
+
+def open_map():
+    game_map = Map(30, 30, game_mode="Utopia", seed=1)
+    for y in range(30):
+        for x in range(30):
+            game_map.set_resource(x, y, None)
+    return game_map
+
+
+def cost(start, path):
+    total = 0
+    for (x0, y0), (x1, y1) in zip([start] + path, path):
+        assert max(abs(x1 - x0), abs(y1 - y0)) == 1  # One step at a time
+        total += 1 if x0 == x1 or y0 == y1 else 1.414
+    return total
+
+
+def test_repaired_path_matches_a_fresh_search():
+    game_map = open_map()
+    game_map.path_repairs = PathRepairs(game_map)
+    game_map.walkability_listeners = [game_map.path_repairs]
+    action = Action(game_map)
+    start, goal = (2, 15), (27, 15)
+    path = action._astar_search(start, goal)
+    for y in (14, 15, 16):
+        game_map.set_walkable(4, y, False)  # A wall across the next steps
+    repaired = game_map.path_repairs.repair(object(), start, path)
+    assert repaired[-1] == goal
+    assert all(game_map.is_tile_free_for_unit(x, y) for x, y in repaired)
+    assert cost(start, repaired) == pytest.approx(cost(start, action._astar_search(start, goal)))
+
+
+def test_second_cut_updates_the_kept_search():
+    game_map = open_map()
+    path_repairs = PathRepairs(game_map)
+    game_map.walkability_listeners = [path_repairs]
+    action = Action(game_map)
+    unit = object()
+    start, goal = (2, 15), (27, 15)
+    game_map.set_walkable(3, 15, False)
+    repaired = path_repairs.repair(unit, start, [(x, 15) for x in range(3, 28)])
+    step = repaired[0]
+    game_map.set_walkable(repaired[1][0], repaired[1][1], False)  # Cut again on the repaired stretch
+    repaired = path_repairs.repair(unit, step, repaired[1:])
+    assert path_repairs.repairs == 1 and path_repairs.searches == 1
+    assert repaired[-1] == goal
+    assert all(game_map.is_tile_free_for_unit(x, y) for x, y in repaired)
+    assert cost(step, repaired) == pytest.approx(cost(step, action._astar_search(step, goal)))
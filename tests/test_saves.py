@@ -0,0 +1,27 @@
+import glob
+import os
+
+import pytest
+
+from backend.Starter_File import players  # Loads the game modules in the order main.py does
+from Game_Engine import GameEngine
+
+SAVES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'annex', '*.dat')))
+
+
+@pytest.mark.parametrize('save', SAVES, ids=os.path.basename)
+def test_every_save_loads(save):
+    engine = GameEngine("Utopia", (20, 20), [], sauvegarde=True)
+    messages = []
+    engine.debug_print = lambda message, *args: messages.append(message)
+    engine.load_game(save)
+    assert not [message for message in messages if message.startswith("Error")]
+    game_map = engine.map
+    assert game_map.routes is not None  # Pathfinding attached at the end of the load
+    for building in game_map.building_refs.values():
+        assert building in game_map.spatial_hash.entity_cells
+    for units in game_map.tile_units.values():
+        for unit in units:
+            assert unit in game_map.spatial_hash.entity_cells
+    engine.is_paused = False
+    engine.step()